@@ -0,0 +1 @@
+"""Highway Havoc game logic, importable without opening a window."""
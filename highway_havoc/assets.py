@@ -0,0 +1,203 @@
+"""Background asset loading with a packed cache of decoded sounds.
+
+:class:`AssetManager` opens the mixer, decodes the sound effects and
+creates the fonts on a worker thread, so the menu can draw while it
+works. Decoded sounds are written, in the mixer's own sample format, into
+one pack file in the user's cache directory. Later launches memory-map
+that file and skip decoding. A sound file that is missing or unreadable
+becomes silence instead of stopping the game.
+
+In the browser build there are no threads, and everything is loaded up
+front instead.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+from .audio import init_mixer
+from .lazy import lazy_import
+from .text import get_font
+
+pygame = lazy_import('pygame')
+
+ASSET_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACK_MAGIC = b'HHPACK1\n'
+FONT_SIZES = (20, 24, 28, 32, 36, 48, 72)
+
+
+def asset_path(name):
+    """Path of a file shipped next to the game, wherever it is started from"""
+    return os.path.join(ASSET_DIR, name)
+
+
+def default_cache_path():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'highway-havoc', 'assets.pack')
+
+
+def silence():
+    """A sound that plays nothing, standing in for a missing file"""
+    return pygame.mixer.Sound(buffer=bytes(64))
+
+
+class SoundPack:
+    """Decoded sounds in one file: magic, index length, JSON index, then raw samples.
+
+    Each index entry records the source file's size and modification time
+    and the mixer format, so an entry is only used while all three still
+    match.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.index = {}
+        self.data = None
+        self._file = None
+
+    def open(self):
+        try:
+            self._file = open(self.path, 'rb')
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.close()
+            return False
+        if self.data[:len(PACK_MAGIC)] != PACK_MAGIC:
+            self.close()
+            return False
+        start = len(PACK_MAGIC) + 4
+        (index_length,) = struct.unpack('<I', self.data[len(PACK_MAGIC):start])
+        try:
+            self.index = json.loads(self.data[start:start + index_length].decode())
+        except ValueError:
+            self.close()
+            return False
+        self._data_start = start + index_length
+        return True
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        if self._file is not None:
+            self._file.close()
+        self.data = self._file = None
+        self.index = {}
+
+    def lookup(self, name, stamp):
+        """The raw samples stored for ``name`` if ``stamp`` still matches"""
+        entry = self.index.get(name)
+        if self.data is None or entry is None or entry['stamp'] != stamp:
+            return None
+        start = self._data_start + entry['offset']
+        return memoryview(self.data)[start:start + entry['length']]
+
+    @staticmethod
+    def write(path, entries):
+        """Write ``{name: (stamp, raw bytes)}`` as a new pack, replacing any old one"""
+        index, offset = {}, 0
+        for name, (stamp, raw) in entries.items():
+            index[name] = {'stamp': stamp, 'offset': offset, 'length': len(raw)}
+            offset += len(raw)
+        header = json.dumps(index).encode()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(PACK_MAGIC + struct.pack('<I', len(header)) + header)
+            for _, raw in entries.values():
+                f.write(raw)
+        os.replace(temp_path, path)
+
+
+class AssetManager:
+    def __init__(self, sounds, font_sizes=FONT_SIZES, cache_path=None, timer=time.perf_counter):
+        self.sound_files = dict(sounds)  # name: file name next to the game
+        self.font_sizes = font_sizes
+        self.cache_path = cache_path if cache_path is not None else default_cache_path()
+        self.timer = timer
+        self.sounds = {}
+        self.missing = []
+        self.total = len(self.sound_files) + len(font_sizes)
+        self.loaded = 0
+        self.warm = None  # whether every sound came from the pack
+        self.started_at = None
+        self.load_time = None
+        self.error = None
+        self._thread = None
+
+    @property
+    def done(self):
+        return self.load_time is not None
+
+    @property
+    def progress(self):
+        return self.loaded / self.total if self.total else 1.0
+
+    def start(self, threaded=True):
+        """Start loading, on a worker thread unless ``threaded`` is False"""
+        self.started_at = self.timer()
+        if threaded:
+            self._thread = threading.Thread(target=self._load, name='asset-loader', daemon=True)
+            self._thread.start()
+        else:
+            self._load()
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def _load(self):
+        try:
+            self._load_sounds()
+            for size in self.font_sizes:
+                get_font(size)
+                self.loaded += 1
+        except Exception as error:  # shown by the front end instead of dying silently on the thread
+            self.error = error
+        self.load_time = self.timer() - self.started_at
+
+    def _load_sounds(self):
+        if not init_mixer():
+            self.missing.extend(self.sound_files.values())  # no audio device; play without sound
+            self.loaded += len(self.sound_files)
+            return
+        mixer_format = list(pygame.mixer.get_init())
+        pack = SoundPack(self.cache_path)
+        pack.open()
+        stamps = {}  # name: stamp of each sound to keep in the pack
+        warm = True
+        for name, file_name in self.sound_files.items():
+            path = asset_path(file_name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.sounds[name] = silence()
+                self.missing.append(file_name)
+                self.loaded += 1
+                continue
+            stamp = [stat.st_size, stat.st_mtime_ns, mixer_format]
+            raw = pack.lookup(name, stamp)
+            if raw is not None:
+                sound = pygame.mixer.Sound(buffer=raw)  # copies the samples
+                raw.release()
+            else:
+                warm = False
+                try:
+                    sound = pygame.mixer.Sound(path)
+                except pygame.error:
+                    sound = silence()
+                    self.missing.append(file_name)
+                    stamp = None
+            self.sounds[name] = sound
+            if stamp is not None:
+                stamps[name] = stamp
+            self.loaded += 1
+        pack.close()
+        self.warm = warm
+        if not warm:
+            # Only a pack that is out of date needs the samples copied out
+            decoded = {name: (stamp, self.sounds[name].get_raw()) for name, stamp in stamps.items()}
+            try:
+                SoundPack.write(self.cache_path, decoded)
+            except OSError:
+                pass  # no cache this time; the sounds are loaded all the same
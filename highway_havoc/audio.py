@@ -0,0 +1,81 @@
+"""Music and sound effects.
+
+The mixer is opened on first use, so nothing here costs anything until a
+sound is actually wanted. Music is streamed from disk by
+``pygame.mixer.music`` instead of being decoded into memory before the
+first frame. Each sound effect is decoded
+once, in the mixer's own format, and gets a few reserved channels of its
+own: when all of them are busy, playing it again cuts off its oldest
+voice rather than stacking another one on top.
+"""
+import os
+
+from .lazy import lazy_import
+
+pygame = lazy_import('pygame')
+
+# The rate and layout our WAVs are recorded in, so loading them needs no
+# resampling; the small buffer keeps effects in step with the picture
+MIXER_FREQUENCY = 48000
+MIXER_SIZE = -16
+MIXER_CHANNELS = 2
+MIXER_BUFFER = 512
+
+
+def init_mixer():
+    """Open the mixer in our format unless it is open already.
+
+    Returns False when there is no audio device to open.
+    """
+    if pygame.mixer.get_init():
+        return True
+    try:
+        pygame.mixer.init(MIXER_FREQUENCY, MIXER_SIZE, MIXER_CHANNELS, MIXER_BUFFER)
+    except pygame.error:
+        return False
+    return True
+
+
+def play_music(path, loops=0, volume=1.0):
+    """Stream ``path`` as background music; a missing or broken file plays nothing"""
+    if not os.path.exists(path) or not init_mixer():
+        return False
+    try:
+        pygame.mixer.music.load(path)
+    except pygame.error:
+        return False
+    pygame.mixer.music.set_volume(volume)
+    pygame.mixer.music.play(loops)
+    return True
+
+
+class SoundEffects:
+    def __init__(self):
+        self.sounds = {}  # name: (sound, channels, when each channel last started)
+        self.reserved = 0
+        self.plays = 0
+
+    def add(self, name, sound, voices=2, volume=1.0):
+        """Use a loaded sound as an effect that plays at most ``voices`` times at once"""
+        sound.set_volume(volume)
+        first = self.reserved
+        self.reserved += voices
+        if pygame.mixer.get_num_channels() < self.reserved:
+            pygame.mixer.set_num_channels(self.reserved)
+        pygame.mixer.set_reserved(self.reserved)
+        channels = [pygame.mixer.Channel(i) for i in range(first, self.reserved)]
+        self.sounds[name] = (sound, channels, [0] * voices)
+
+    def play(self, name):
+        """Play an effect; effects that haven't been added yet are silent"""
+        if name not in self.sounds:
+            return
+        sound, channels, started = self.sounds[name]
+        for i, channel in enumerate(channels):
+            if not channel.get_busy():
+                break
+        else:
+            i = started.index(min(started))  # steal the oldest voice
+        self.plays += 1
+        started[i] = self.plays
+        channels[i].play(sound)
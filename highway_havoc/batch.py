@@ -0,0 +1,380 @@
+"""Vectorised simulation of many games at once.
+
+:class:`BatchSimulation` keeps N independent games in NumPy arrays and
+advances all of them with a single :meth:`~BatchSimulation.step`. It plays
+by the same rules as :func:`highway_havoc.simulation.step` driven by a
+:class:`~highway_havoc.simulation.FixedStepRunner`: spawning, the boost and
+spike speed curves, falling objects, collisions and scoring all match the
+``Car``/``Coin``/``Spikes`` code. Effects are evaluated one by one here
+and from the closed-form :class:`~highway_havoc.effects.EffectTimeline` in
+``Car``, so distances can differ in the last few bits; everything else
+agrees exactly. Floating texts and flashes are left out because they never
+change how a game ends.
+
+Spawn randomness comes from one ``numpy.random.Generator`` for the whole
+batch instead of a ``random.Random`` per game, so a batch game and an
+object-oriented game only line up when they are fed the same draws.
+
+Needs NumPy.
+"""
+import numpy as np
+
+from .settings import (
+    SCREEN_HEIGHT, ROAD_X, LANE_WIDTH, N_LANES,
+    FIXED_TIMESTEP, Tuning,
+)
+from .effects import BOOST, SLOWDOWN
+from .spawner import SPAWN_Y, SPAWN_CLEARANCE, MAX_QUEUED_SPAWNS, FREE_LANES, SpawnStats
+from .store import COIN, SPIKE
+
+FALL_SPEED = 5 * 50  # Coin/Spikes fall_speed, in pixels per second
+
+CAR_Y = SCREEN_HEIGHT * 2 // 3
+CAR_WIDTH = 50
+CAR_HEIGHT = 30
+BASE_SPEED = 5
+
+# x of a car in each lane, and of a coin or spike spawned there
+CAR_LANE_X = np.array([ROAD_X + lane * LANE_WIDTH + LANE_WIDTH // 2 - CAR_WIDTH // 2 for lane in range(N_LANES)], dtype=float)
+OBJECT_LANE_X = np.array([ROAD_X + lane * LANE_WIDTH + LANE_WIDTH // 2 - 10 for lane in range(N_LANES)], dtype=float)
+
+# FREE_LANES as arrays: how many lanes each bitmask has free, and which
+N_FREE_LANES = np.array([len(lanes) for lanes in FREE_LANES])
+FREE_LANE_TABLE = np.array([lanes + (0,) * (N_LANES - len(lanes)) for lanes in FREE_LANES])
+
+
+class EffectQueue:
+    """Boosts or spike slowdowns of every game, oldest first.
+
+    Every effect of one kind lasts the same time, so they expire in the
+    order they were added and each game's effects fit in a ring buffer.
+    ``speed_sign`` is +1 for boosts and -1 for spikes.
+    """
+    def __init__(self, n_games, hold, decay, speed_sign, capacity=8):
+        self.hold = hold
+        self.decay = decay
+        self.speed_sign = speed_sign
+        self.start_time = np.zeros((n_games, capacity))
+        self.amount = np.zeros((n_games, capacity))
+        self.head = np.zeros(n_games, dtype=np.int64)
+        self.count = np.zeros(n_games, dtype=np.int64)
+        self.rows = np.arange(n_games)
+
+    @property
+    def capacity(self):
+        return self.start_time.shape[1]
+
+    def clear(self):
+        self.head[:] = 0
+        self.count[:] = 0
+
+    def _grow(self):
+        order = (self.head[:, None] + np.arange(self.capacity)) % self.capacity
+        start_time = np.zeros((len(self.rows), self.capacity * 2))
+        amount = np.zeros_like(start_time)
+        start_time[:, :self.capacity] = np.take_along_axis(self.start_time, order, 1)
+        amount[:, :self.capacity] = np.take_along_axis(self.amount, order, 1)
+        self.start_time, self.amount = start_time, amount
+        self.head[:] = 0
+
+    def push(self, games, start_time, amounts):
+        if np.any(self.count[games] == self.capacity):
+            self._grow()
+        slot = (self.head[games] + self.count[games]) % self.capacity
+        self.start_time[games, slot] = start_time
+        self.amount[games, slot] = amounts
+        self.count[games] += 1
+
+    def apply(self, speed, position_offset, now, delta_time, active):
+        """Add each live effect to speed and position offset, oldest first.
+
+        Only games that are playing and have effects are touched, and
+        expired effects are dropped. The additions go through cumsum, which
+        adds strictly left to right, so a game's result doesn't depend on
+        how many other games share the batch.
+        """
+        rows = np.flatnonzero(active & (self.count > 0))
+        if len(rows) == 0:
+            return
+        count = self.count[rows]
+        head = self.head[rows]
+        k = int(count.max())
+        slot = (head[:, None] + np.arange(k)) % self.capacity
+        valid = np.arange(k) < count[:, None]
+        amount = self.amount[rows[:, None], slot]
+        t = now - self.start_time[rows[:, None], slot]
+        offset_sign = -self.speed_sign
+
+        holding = valid & (t < self.hold)
+        decaying = valid & ~holding & (t < self.hold + self.decay)
+        hold_progress = t / self.hold
+        decay_progress = (t - self.hold) / self.decay
+        remaining = amount * (1 - decay_progress)
+        speed_terms = np.where(holding, self.speed_sign * amount,
+                               np.where(decaying, self.speed_sign * remaining, 0.0))
+        offset_terms = np.where(holding, offset_sign * amount * 10 * (1 - (hold_progress ** 2)),
+                                np.where(decaying, offset_sign * remaining * 5 * (1 - ((1 - decay_progress) ** 2)), 0.0))
+
+        speed[rows] = np.cumsum(np.column_stack((speed[rows], speed_terms)), axis=1)[:, -1]
+        position_offset[rows] = np.cumsum(np.column_stack((position_offset[rows], offset_terms * delta_time)), axis=1)[:, -1]
+
+        expired = np.sum(valid & ~holding & ~decaying, axis=1)
+        self.head[rows] = (head + expired) % self.capacity
+        self.count[rows] = count - expired
+
+
+class BatchSimulation:
+    """N independent games advanced together in fixed timesteps"""
+    def __init__(self, n_games, seed=None, timestep=FIXED_TIMESTEP, tuning=None):
+        self.n_games = n_games
+        self.seed = seed
+        self.timestep = timestep
+        self.tuning = tuning if tuning is not None else Tuning()
+        self.rng = np.random.default_rng(seed)
+        self.rows = np.arange(n_games)
+
+        # Cars
+        self.lane = np.zeros(n_games, dtype=np.int64)
+        self.car_x = np.zeros(n_games)
+        self.speed = np.zeros(n_games)
+        self.position_offset = np.zeros(n_games)
+        self.distance = np.zeros(n_games)
+        self.last_coin_time = np.zeros(n_games)
+        self.last_spike_time = np.zeros(n_games)
+        self.last_spike_decrease = np.zeros(n_games)
+        self.boosts = EffectQueue(n_games, BOOST.hold, BOOST.fade, BOOST.speed_sign)
+        self.slowdowns = EffectQueue(n_games, SLOWDOWN.hold, SLOWDOWN.fade, SLOWDOWN.speed_sign)
+
+        # Score
+        self.money = np.zeros(n_games, dtype=np.int64)
+        self.coins_collected = np.zeros(n_games, dtype=np.int64)
+        self.spikes_hit = np.zeros(n_games, dtype=np.int64)
+        self.playing = np.zeros(n_games, dtype=bool)
+        self.end_time = np.zeros(n_games)
+
+        # Falling objects, one row of max_objects_on_screen slots per game
+        shape = (n_games, self.tuning.max_objects_on_screen)
+        self.object_alive = np.zeros(shape, dtype=bool)
+        self.object_kind = np.zeros(shape, dtype=np.int8)
+        self.object_lane = np.zeros(shape, dtype=np.int64)
+        self.object_y = np.zeros(shape)
+        self.object_order = np.zeros(shape, dtype=np.int64)
+        self.spawn_count = 0
+        self.last_spawn_time = np.zeros(n_games)
+
+        # Spawns waiting for room, a ring of kinds per game, and their counts
+        self.spawn_queue = np.zeros((n_games, MAX_QUEUED_SPAWNS), dtype=np.int8)
+        self.queue_head = np.zeros(n_games, dtype=np.int64)
+        self.queue_count = np.zeros(n_games, dtype=np.int64)
+        self.spawn_stats = {name: np.zeros(n_games, dtype=np.int64) for name in SpawnStats.FIELDS}
+
+        self.reset()
+
+    def reset(self):
+        """Start a new game in every slot"""
+        self.time = 0.0
+        self.ticks = 0
+        self.lane[:] = 1
+        self.car_x[:] = CAR_LANE_X[1]
+        self.speed[:] = BASE_SPEED
+        self.position_offset[:] = 0
+        self.distance[:] = 0
+        self.last_coin_time[:] = 0
+        self.last_spike_time[:] = 0
+        self.last_spike_decrease[:] = 0
+        self.boosts.clear()
+        self.slowdowns.clear()
+        self.money[:] = 0
+        self.coins_collected[:] = 0
+        self.spikes_hit[:] = 0
+        self.playing[:] = True
+        self.end_time[:] = 0
+        self.object_alive[:] = False
+        self.last_spawn_time[:] = -np.inf
+        self.queue_head[:] = 0
+        self.queue_count[:] = 0
+        for counts in self.spawn_stats.values():
+            counts[:] = 0
+
+    @property
+    def object_x(self):
+        return OBJECT_LANE_X[self.object_lane]
+
+    def draw_kinds(self, games):
+        """Coin/spike roll for the spawn each game in ``games`` requests"""
+        return self.rng.random(len(games))
+
+    def draw_lanes(self, n_free):
+        """Index into its free lanes of the lane each placed spawn takes"""
+        return self.rng.integers(0, n_free)
+
+    def _request_spawns(self, now):
+        speed_multiplier = np.where(self.speed > 0, np.maximum(self.speed / BASE_SPEED, 0.1), 0.1)
+        dynamic_spawn_interval = self.tuning.base_spawn_interval / speed_multiplier
+        games = np.flatnonzero(self.playing & (now - self.last_spawn_time > dynamic_spawn_interval))
+        self.last_spawn_time[games] = now
+        kinds = np.where(self.draw_kinds(games) < self.tuning.coin_chance, COIN, SPIKE)
+        self.spawn_stats['requested'][games] += 1
+
+        full = self.queue_count[games] >= MAX_QUEUED_SPAWNS
+        self.spawn_stats['dropped'][games[full]] += 1
+        games, kinds = games[~full], kinds[~full]
+        tail = (self.queue_head[games] + self.queue_count[games]) % MAX_QUEUED_SPAWNS
+        self.spawn_queue[games, tail] = kinds
+        self.queue_count[games] += 1
+        return games
+
+    def _free_lanes(self, games):
+        """Bitmask of the lanes whose spawn point is clear, per game"""
+        near = self.object_alive[games] & (np.abs(self.object_y[games] - SPAWN_Y) < SPAWN_CLEARANCE)
+        blocked = np.zeros(len(games), dtype=np.int64)
+        for lane in range(N_LANES):
+            blocked |= np.any(near & (self.object_lane[games] == lane), axis=1) << lane
+        return ~blocked & ((1 << N_LANES) - 1)
+
+    def _place_spawns(self):
+        """Place queued spawns, one per game per round, while there is room"""
+        for _ in range(MAX_QUEUED_SPAWNS):
+            room = self.object_alive.sum(axis=1) < self.tuning.max_objects_on_screen
+            games = np.flatnonzero(self.playing & (self.queue_count > 0) & room)
+            free = self._free_lanes(games)
+            games, free = games[N_FREE_LANES[free] > 0], free[N_FREE_LANES[free] > 0]
+            if len(games) == 0:
+                return
+            lane = FREE_LANE_TABLE[free, self.draw_lanes(N_FREE_LANES[free])]
+            kind = self.spawn_queue[games, self.queue_head[games]]
+            self.queue_head[games] = (self.queue_head[games] + 1) % MAX_QUEUED_SPAWNS
+            self.queue_count[games] -= 1
+            self.spawn_stats['placed'][games] += 1
+
+            slot = np.argmin(self.object_alive[games], axis=1)
+            self.object_alive[games, slot] = True
+            self.object_kind[games, slot] = kind
+            self.object_lane[games, slot] = lane
+            self.object_y[games, slot] = SPAWN_Y
+            self.object_order[games, slot] = self.spawn_count + np.arange(len(games))
+            self.spawn_count += len(games)
+
+    def _spawn(self, now):
+        queued = self._request_spawns(now)
+        self._place_spawns()
+        # A new request still waiting is last in its game's queue
+        self.spawn_stats['deferred'][queued[self.queue_count[queued] > 0]] += 1
+
+    def _collect_coins(self, games, now):
+        combo = now - self.last_coin_time[games] <= 1
+        self.boosts.push(games, now, np.where(combo, self.tuning.coin_combo_boost, self.tuning.coin_boost))
+        self.last_coin_time[games] = now
+        self.coins_collected[games] += 1
+        self.money[games] += np.where(combo, 5, 10)
+
+    def _hit_spikes(self, games, now):
+        combo = now - self.last_spike_time[games] <= 1
+        decrease_amount = np.where(combo, self.last_spike_decrease[games] * self.tuning.spike_combo_factor, self.tuning.spike_decrease)
+        self.slowdowns.push(games, now, decrease_amount)
+        self.last_spike_time[games] = now
+        self.last_spike_decrease[games] = decrease_amount
+        self.spikes_hit[games] += 1
+        self.money[games] = np.maximum(0, self.money[games] - 25)
+
+    def _resolve_hits(self, hits, collect, now):
+        # Objects are collected in the order they spawned, like the coin and spike lists
+        while hits.any():
+            games = np.flatnonzero(hits.any(axis=1))
+            order = np.where(hits[games], self.object_order[games], np.iinfo(np.int64).max)
+            slot = np.argmin(order, axis=1)
+            collect(games, now)
+            hits[games, slot] = False
+
+    def step(self, moves=None):
+        """Advance every game still playing by one timestep.
+
+        ``moves`` is an optional array of lane changes (-1, 0 or 1) per game.
+        Returns the ``playing`` mask.
+        """
+        dt = self.timestep
+        self.time += dt
+        self.ticks += 1
+        now = self.time
+        active = self.playing.copy()
+
+        if moves is not None:
+            new_lane = self.lane + moves
+            self.lane = np.where(active & (new_lane >= 0) & (new_lane < N_LANES), new_lane, self.lane)
+
+        self._spawn(now)
+
+        speed = np.full(self.n_games, float(BASE_SPEED))
+        position_offset = np.zeros(self.n_games)
+        self.boosts.apply(speed, position_offset, now, dt, active)
+        self.slowdowns.apply(speed, position_offset, now, dt, active)
+        self.speed = np.where(active, np.maximum(speed, 0), self.speed)
+        self.position_offset = np.where(active, np.maximum(np.minimum(position_offset, 0), -100), self.position_offset)
+        self.distance = np.where(active, self.distance + self.speed * dt * 10, self.distance)
+
+        game_over = active & (self.speed <= 0)
+        self.playing &= ~game_over
+        self.end_time[game_over] = now
+
+        # Falling objects, then collisions against where the car is now
+        moving = self.object_alive & active[:, None]
+        self.object_y = np.where(moving, self.object_y + FALL_SPEED * dt, self.object_y)
+        self.object_alive &= ~(moving & (self.object_y > SCREEN_HEIGHT))
+        car_y = CAR_Y + self.position_offset
+        hits = (self.object_alive & active[:, None]
+                & (np.abs(self.object_x - self.car_x[:, None]) < CAR_WIDTH)
+                & (np.abs(self.object_y - car_y[:, None]) < CAR_HEIGHT))
+        self.object_alive &= ~hits
+        self._resolve_hits(hits & (self.object_kind == COIN), self._collect_coins, now)
+        self._resolve_hits(hits & (self.object_kind == SPIKE), self._hit_spikes, now)
+
+        # Slide towards the target lane
+        target_x = CAR_LANE_X[self.lane]
+        sliding = active & (np.abs(self.car_x - target_x) > 1)
+        self.car_x = np.where(sliding, self.car_x + (target_x - self.car_x) * 0.1, self.car_x)
+        return self.playing
+
+    def run(self, max_ticks, policy=None):
+        """Step until every game is over or ``max_ticks`` have passed.
+
+        ``policy(batch)`` may return an array of lane changes each tick.
+        """
+        while self.ticks < max_ticks and self.playing.any():
+            self.step(policy(self) if policy is not None else None)
+        return self
+
+
+# Bots for headless runs: each takes a batch and returns lane changes per game
+
+def idle_policy(batch):
+    return None
+
+
+def random_policy(batch, change_chance=0.02):
+    """Change lane at random every so often"""
+    roll = batch.rng.random(batch.n_games)
+    direction = np.where(batch.rng.random(batch.n_games) < 0.5, -1, 1)
+    return np.where(roll < change_chance, direction, 0)
+
+
+def dodge_policy(batch, lookahead=150):
+    """Steer one lane at a time away from spikes and towards coins"""
+    ahead = (batch.object_alive
+             & (batch.object_y > CAR_Y - lookahead)
+             & (batch.object_y < CAR_Y + CAR_HEIGHT))
+    score = np.zeros((batch.n_games, N_LANES))
+    for lane in range(N_LANES):
+        in_lane = ahead & (batch.object_lane == lane)
+        score[:, lane] = (np.any(in_lane & (batch.object_kind == COIN), axis=1)
+                          - 10 * np.any(in_lane & (batch.object_kind == SPIKE), axis=1))
+    # Only neighbouring lanes are one move away; prefer staying put on ties
+    reach = np.abs(np.arange(N_LANES) - batch.lane[:, None])
+    score = np.where(reach <= 1, score - 0.1 * reach, -np.inf)
+    return np.sign(np.argmax(score, axis=1) - batch.lane)
+
+
+POLICIES = {
+    'idle': idle_policy,
+    'random': random_policy,
+    'dodge': dodge_policy,
+}
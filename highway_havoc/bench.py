@@ -0,0 +1,524 @@
+"""Benchmarks for the simulation and rendering hot paths.
+
+Every benchmark is run at each object count in ``--counts`` (8, 100, 1,000
+and 10,000 by default) from a fixed seed, and the median and best time
+per call are reported. Results can be written as JSON and compared with
+an earlier run, so a regression shows up as a ratio next to its name::
+
+    python -m highway_havoc.bench --json before.json
+    ... change things ...
+    python -m highway_havoc.bench --json after.json --compare before.json
+
+Rendering is done onto an offscreen surface with SDL's dummy video
+driver, so no window is opened. ``legacy_*`` benchmarks time the code the
+package replaced next to the current versions: the effect timers, spawn
+check and popups as they were in ``RESTARTED.py``, and, as
+``legacy_car_effects``, the simpler offset math of the
+``tempCodeRunnerFile.py`` variant.
+
+``--pacing SECONDS`` also runs a frame loop paced by FrameScheduler and
+reports the frame rate it achieves, its jitter and missed deadlines.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from .clock import FrameScheduler, SimulatedClock
+from .effects import BOOST, SLOWDOWN
+from .entities import Car, SimplifiedGameState
+from .highway import generate_chunk
+from .particles import FloatingTexts
+from .render import Hud, draw_floating_texts, draw_playing
+from .road import RoadLayer
+from .settings import SCREEN_WIDTH, SCREEN_HEIGHT, ROAD_X, LANE_WIDTH, N_LANES, FIXED_TIMESTEP, FPS, Tuning
+from .simulation import SimulationState, spawn_objects, step
+from .spawner import SPAWN_CLEARANCE, SPAWN_X, SPAWN_Y
+from .store import COIN, SPIKE
+
+COUNTS = (8, 100, 1000, 10000)
+
+
+def time_calls(func, min_time=0.2, repeats=5):
+    """Median and best seconds per call of ``func()``"""
+    calls = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / repeats:
+            break
+        calls *= 2
+    per_call = [elapsed / calls]
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        per_call.append((time.perf_counter() - started) / calls)
+    return {'median_us': float(np.median(per_call)) * 1e6, 'best_us': min(per_call) * 1e6, 'calls': calls}
+
+
+def make_car():
+    return Car(SCREEN_WIDTH // 2 - 25, SCREEN_HEIGHT * 2 // 3, 50, 30, 1, 'blue', SimulatedClock())
+
+
+def populate(sim, count, rng):
+    """Fill a game with ``count`` objects spread over the lanes and screen"""
+    for _ in range(count):
+        lane = rng.randrange(N_LANES)
+        x = ROAD_X + lane * LANE_WIDTH + LANE_WIDTH // 2 - 10
+        if rng.random() < 0.6:
+            sim.objects.add(COIN, x, rng.uniform(-20, SCREEN_HEIGHT - 20), 20, 20)
+        else:
+            sim.objects.add(SPIKE, x, rng.uniform(-20, SCREEN_HEIGHT - 20), 25, 25)
+
+
+# --- The code the package replaced, as it was in RESTARTED.py
+
+def legacy_update_timers(car, boost_timers, spike_timers, current_time, delta_time):
+    car.speed = car.base_speed
+    car.position_offset = 0
+
+    # Gradual position offset for boost and spike effects
+    for boost in boost_timers[:]:
+        t = current_time - boost['start_time']
+        if t < 3:
+            car.speed += boost['amount']
+            # Smoothly interpolate position offset (ease out)
+            boost_progress = t / 3
+            offset = -boost['amount'] * 10 * (1 - (boost_progress ** 2))
+            car.position_offset += offset * delta_time
+        elif t < 7:
+            progress = (t - 3) / 4
+            remaining_boost = boost['amount'] * (1 - progress)
+            car.speed += remaining_boost
+            # Smoothly interpolate position offset (ease in)
+            offset = -remaining_boost * 5 * (1 - ((1 - progress) ** 2))
+            car.position_offset += offset * delta_time
+        else:
+            boost_timers.remove(boost)
+
+    for spike in spike_timers[:]:
+        t = current_time - spike['start_time']
+        if t < 2:
+            car.speed -= spike['amount']
+            # Smoothly interpolate position offset (ease out)
+            spike_progress = t / 2
+            offset = spike['amount'] * 10 * (1 - (spike_progress ** 2))
+            car.position_offset += offset * delta_time
+        elif t < 6:
+            progress = (t - 2) / 4
+            remaining_slowdown = spike['amount'] * (1 - progress)
+            car.speed -= remaining_slowdown
+            # Smoothly interpolate position offset (ease in)
+            offset = remaining_slowdown * 5 * (1 - ((1 - progress) ** 2))
+            car.position_offset += offset * delta_time
+        else:
+            spike_timers.remove(spike)
+
+    car.speed = max(car.speed, 0)  # Allow speed to reach 0
+    car.position_offset = max(min(car.position_offset, 0), -100)
+    car.distance += car.speed * delta_time * 10
+
+
+def legacy_update_speed_and_position(car, boost_timers, spike_timers, current_time, delta_time):
+    """The tempCodeRunnerFile.py variant of the timers, with a fixed offset per effect"""
+    car.speed = car.base_speed
+    car.position_offset = 0
+
+    for boost in boost_timers[:]:
+        t = current_time - boost['start_time']
+        if t < 3:
+            car.speed += boost['amount']
+            car.position_offset -= boost['amount'] * 2
+        elif t < 7:
+            progress = (t - 3) / 4
+            remaining_boost = boost['amount'] * (1 - progress)
+            car.speed += remaining_boost
+            car.position_offset -= remaining_boost * 2
+        else:
+            boost_timers.remove(boost)
+
+    for spike in spike_timers[:]:
+        t = current_time - spike['start_time']
+        if t < 2:
+            car.speed -= spike['amount']
+            car.position_offset += spike['amount'] * 2
+        elif t < 6:
+            progress = (t - 2) / 4
+            remaining_slowdown = spike['amount'] * (1 - progress)
+            car.speed -= remaining_slowdown
+            car.position_offset += remaining_slowdown * 2
+        else:
+            spike_timers.remove(spike)
+
+    car.speed = max(car.speed, 0)
+    car.position_offset = max(min(car.position_offset, 0), -100)
+    car.distance += car.speed * delta_time * 10
+
+
+def legacy_check_spawn_collision(new_x, new_y, existing_objects):
+    import math
+    collision_radius = 10
+    for obj in existing_objects:
+        if not (hasattr(obj, 'collected') and obj.collected) and not (hasattr(obj, 'hit') and obj.hit):
+            distance = math.sqrt((new_x - obj.x)**2 + (new_y - obj.y)**2)
+            if distance < collision_radius:
+                return True
+    return False
+
+
+def legacy_update_floating_texts(floating_texts, current_time, delta_time):
+    for text in floating_texts[:]:  # loop over a copy
+        elapsed = current_time - text['start_time']
+        if elapsed >= text['duration']:
+            floating_texts.remove(text)  # safe to remove from the original
+        else:
+            text['y'] += text['vel_y'] * delta_time
+            text['vel_y'] *= 0.98
+
+
+def legacy_draw_floating_texts(screen, floating_texts, current_time, font):
+    for text_obj in floating_texts:
+        elapsed = current_time - text_obj['start_time']
+        alpha = max(0, 255 - int(255 * elapsed / text_obj['duration']))
+        text_surface = font.render(text_obj['text'], True, text_obj['color'])
+        text_surface.set_alpha(alpha)
+        x = text_obj['x'] - text_surface.get_width() // 2
+        screen.blit(text_surface, (x, text_obj['y']))
+
+
+# --- Benchmarks: each takes (count, rng) and returns the function to time
+
+def bench_car_effects(count, rng):
+    car = make_car()
+    car.clock.reset(10.0)
+    for _ in range(count):
+        shape = BOOST if rng.random() < 0.5 else SLOWDOWN
+        car.effects.add(shape, rng.uniform(4.0, 10.0), rng.choice((5, 20, 30)))
+    return lambda: car.update_speed_and_position(FIXED_TIMESTEP)
+
+
+def legacy_timer_lists(count, rng):
+    """``count`` boost and spike timers as RESTARTED.py kept them"""
+    boosts, spikes = [], []
+    for _ in range(count):
+        timers = boosts if rng.random() < 0.5 else spikes
+        timers.append({'start_time': rng.uniform(4.0, 10.0), 'amount': rng.choice((5, 20, 30))})
+    return boosts, spikes
+
+
+def bench_legacy_timers(count, rng):
+    """The same effects as RESTARTED.py's per-frame scan of its timer lists"""
+    car = make_car()
+    boosts, spikes = legacy_timer_lists(count, rng)
+    return lambda: legacy_update_timers(car, boosts, spikes, 10.0, FIXED_TIMESTEP)
+
+
+def bench_legacy_car_effects(count, rng):
+    car = make_car()
+    boosts, spikes = legacy_timer_lists(count, rng)
+    return lambda: legacy_update_speed_and_position(car, boosts, spikes, 10.0, FIXED_TIMESTEP)
+
+
+def bench_spawn_check(count, rng):
+    """Which lanes have a clear spawn point, as the spawner asks it"""
+    sim = SimulationState(seed=1)
+    populate(sim, count, rng)
+    return lambda: sim.objects.clear_lanes(SPAWN_Y, SPAWN_CLEARANCE)
+
+
+def bench_legacy_spawn_check(count, rng):
+    """The same question as one legacy spawn check per lane"""
+    sim = SimulationState(seed=1)
+    populate(sim, count, rng)
+    objects = sim.coins + sim.spikes
+    return lambda: [legacy_check_spawn_collision(x, SPAWN_Y, objects) for x in SPAWN_X]
+
+
+def bench_spawn(count, rng):
+    sim = SimulationState(seed=1)
+    sim.reset()
+    populate(sim, count, rng)
+    sim.tuning.max_objects_on_screen = count + 1
+
+    def spawn():
+        sim.last_spawn_time = -1e9
+        before = sim.objects.count
+        spawn_objects(sim)
+        if sim.objects.count > before:
+            sim.objects.set_alive(int(np.argmax(sim.objects.order * sim.objects.alive)), False)
+    return spawn
+
+
+def bench_highway_spawn(count, rng):
+    """Spawning on a highway, with the car on the next row every call"""
+    sim = SimulationState(seed=1, highway=True)
+    sim.reset()
+    populate(sim, count, rng)
+    sim.tuning.max_objects_on_screen = count + 8
+
+    def spawn():
+        sim.car.distance = sim.highway.next_distance
+        before = sim.objects.count
+        spawn_objects(sim)
+        for _ in range(sim.objects.count - before):
+            sim.objects.set_alive(int(np.argmax(sim.objects.order * sim.objects.alive)), False)
+    return spawn
+
+
+def bench_chunk(count, rng):
+    """Generating a chunk from scratch, ``count`` chunks down the road"""
+    tuning = Tuning()
+    return lambda: generate_chunk(1, count, tuning)
+
+
+def bench_objects(count, rng):
+    """A step with spawning held off: falling, culling and the collision query.
+
+    The car sits below the screen so nothing is collected and every call
+    sees the same objects.
+    """
+    sim = SimulationState(seed=1)
+    sim.reset()
+    populate(sim, count, rng)
+    sim.tuning.max_objects_on_screen = 0
+    sim.car.y = SCREEN_HEIGHT * 2
+
+    def tick():
+        step(sim, (), FIXED_TIMESTEP)
+        sim.objects.y[:] -= sim.objects.fall_speed * 50 * FIXED_TIMESTEP
+    return tick
+
+
+def car_boxes(cars, rng):
+    """(x, y, width, height) of ``cars`` cars spread over the lanes"""
+    return [(ROAD_X + rng.randrange(N_LANES) * LANE_WIDTH + LANE_WIDTH // 2 - 25,
+             SCREEN_HEIGHT * 2 // 3 - rng.uniform(0, 100), 50, 30) for _ in range(cars)]
+
+
+def bench_collide(count, rng, cars=1):
+    """Test ``count`` objects against ``cars`` cars in one pass"""
+    sim = SimulationState(seed=1)
+    populate(sim, count, rng)
+    boxes = car_boxes(cars, rng)
+    return lambda: sim.objects.colliding(boxes)
+
+
+def bench_legacy_collide(count, rng, cars=1):
+    """The same test as one overlap query per car"""
+    sim = SimulationState(seed=1)
+    populate(sim, count, rng)
+    boxes = car_boxes(cars, rng)
+    return lambda: [sim.objects.overlapping(*box) for box in boxes]
+
+
+def bench_hud(count, rng):
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    car = make_car()
+    game_state = SimplifiedGameState(car.clock)
+    hud = Hud()
+    for i in range(count):
+        game_state.add_floating_text(rng.choice(('+10', '+5', '-25')), rng.uniform(ROAD_X, ROAD_X + 400),
+                                     rng.uniform(0, SCREEN_HEIGHT), rng.choice(('yellow', 'red')))
+
+    def draw():
+        hud.draw(screen, car, game_state)
+        draw_floating_texts(screen, game_state)
+    return draw
+
+
+def bench_popups(count, rng):
+    """Float and draw ``count`` popups, a fifth of which expire and are replaced each call"""
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    clock = SimulatedClock()
+    texts = FloatingTexts(capacity=count, clock=clock)
+    game_state = SimplifiedGameState(clock)
+    game_state.floating_texts = texts
+    popups = [(rng.choice(('+10', '+5', '-25')), rng.uniform(ROAD_X, ROAD_X + 400),
+               rng.uniform(0, SCREEN_HEIGHT), rng.choice(('yellow', 'red'))) for _ in range(count)]
+    for i, (text, x, y, color) in enumerate(popups):
+        clock.reset(i * 2.0 / count)
+        texts.add(text, x, y, color)
+    renew = max(count // 5, 1)
+
+    def frame():
+        clock.tick(0.4)
+        texts.update(FIXED_TIMESTEP)
+        for text, x, y, color in popups[:renew]:
+            texts.add(text, x, y, color)
+        draw_floating_texts(screen, game_state)
+    return frame
+
+
+def bench_legacy_popups(count, rng):
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    font = pygame.font.Font(None, 32)
+    clock = SimulatedClock()
+    popups = [(rng.choice(('+10', '+5', '-25')), rng.uniform(ROAD_X, ROAD_X + 400),
+               rng.uniform(0, SCREEN_HEIGHT), rng.choice(('yellow', 'red'))) for _ in range(count)]
+
+    def add(text, x, y, color):
+        texts.append({'text': text, 'x': x, 'y': y, 'color': color,
+                      'start_time': clock.now, 'duration': 2.0, 'vel_y': -30})
+    texts = []
+    for i, popup in enumerate(popups):
+        clock.reset(i * 2.0 / count)
+        add(*popup)
+    renew = max(count // 5, 1)
+
+    def frame():
+        clock.tick(0.4)
+        legacy_update_floating_texts(texts, clock.now, FIXED_TIMESTEP)
+        for popup in popups[:renew]:
+            add(*popup)
+        legacy_draw_floating_texts(screen, texts, clock.now, font)
+    return frame
+
+
+def bench_frame(count, rng):
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    sim = SimulationState(seed=1)
+    sim.reset()
+    populate(sim, count, rng)
+    for _ in range(min(count, 50)):
+        sim.game_state.add_score(10, rng.uniform(ROAD_X, ROAD_X + 400), rng.uniform(0, SCREEN_HEIGHT), 'yellow')
+    road = RoadLayer()
+    hud = Hud()
+    return lambda: draw_playing(screen, sim, road, hud)
+
+
+BENCHMARKS = {
+    'car_effects': bench_car_effects,
+    'legacy_timers': bench_legacy_timers,
+    'legacy_car_effects': bench_legacy_car_effects,
+    'spawn_check': bench_spawn_check,
+    'legacy_spawn_check': bench_legacy_spawn_check,
+    'spawn': bench_spawn,
+    'highway_spawn': bench_highway_spawn,
+    'chunk': bench_chunk,
+    'objects': bench_objects,
+    'collide_2_cars': lambda count, rng: bench_collide(count, rng, 2),
+    'legacy_collide_2_cars': lambda count, rng: bench_legacy_collide(count, rng, 2),
+    'collide_16_cars': lambda count, rng: bench_collide(count, rng, 16),
+    'legacy_collide_16_cars': lambda count, rng: bench_legacy_collide(count, rng, 16),
+    'hud': bench_hud,
+    'popups': bench_popups,
+    'legacy_popups': bench_legacy_popups,
+    'frame': bench_frame,
+}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+            'pygame': pygame.version.ver, 'machine': platform.machine(), 'system': platform.system()}
+
+
+def run_benchmarks(names, counts, seed=0, min_time=0.2):
+    pygame.display.init()
+    pygame.font.init()
+    pygame.display.set_mode((1, 1))
+    results = {}
+    for name in names:
+        results[name] = {}
+        for count in counts:
+            func = BENCHMARKS[name](count, random.Random(seed))
+            results[name][str(count)] = time_calls(func, min_time)
+            print(f"{name:<20}{count:>7}  {results[name][str(count)]['median_us']:>12.2f} us", file=sys.stderr)
+    return results
+
+
+def measure_pacing(seconds, fps=FPS, count=8, seed=0):
+    """Draw and flip frames for ``seconds`` under a FrameScheduler"""
+    pygame.display.init()
+    pygame.font.init()
+    display = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    draw = bench_frame(count, random.Random(seed))
+    scheduler = FrameScheduler(fps)
+    intervals = []
+
+    async def loop():
+        await scheduler.wait()
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            intervals.append(await scheduler.wait())
+            draw()
+            pygame.display.flip()
+    asyncio.run(loop())
+
+    intervals = np.array(intervals) * 1000
+    q1, median, q3 = np.percentile(intervals, [25, 50, 75])
+    return {'target_fps': fps, 'achieved_fps': float(len(intervals) / intervals.sum() * 1000),
+            'frames': len(intervals), 'mean_ms': float(intervals.mean()), 'jitter_ms': float(intervals.std()),
+            'median_ms': float(median), 'iqr_ms': float(q3 - q1),
+            'p99_ms': float(np.percentile(intervals, 99)), 'max_ms': float(intervals.max()),
+            'missed': scheduler.missed, 'worst_lateness_ms': scheduler.worst_lateness * 1000}
+
+
+def format_results(results, baseline=None):
+    lines = []
+    for name, by_count in results.items():
+        for count, timing in by_count.items():
+            line = f"{name:<20}{count:>7}  {timing['median_us']:>12.2f} us"
+            before = (baseline or {}).get(name, {}).get(count)
+            if before is not None:
+                line += f"  {timing['median_us'] / before['median_us']:>6.2f}x vs {before['median_us']:.2f} us"
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the simulation and rendering hot paths.")
+    parser.add_argument('benchmarks', nargs='*', metavar='NAME',
+                        help=f"benchmarks to run (default: all), from: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--counts', type=lambda text: [int(c) for c in text.split(',')], default=list(COUNTS),
+                        help="comma-separated object counts")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds to spend on each measurement")
+    parser.add_argument('--json', metavar='PATH', help="write the results as JSON")
+    parser.add_argument('--compare', metavar='PATH', help="JSON from an earlier run to compare against")
+    parser.add_argument('--pacing', type=float, metavar='SECONDS',
+                        help="also measure frame pacing for SECONDS (on its own if no benchmarks are named)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark {unknown[0]!r}")
+
+    names = args.benchmarks or ([] if args.pacing else list(BENCHMARKS))
+    results = run_benchmarks(names, args.counts, args.seed, args.min_time)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print(format_results(results, baseline))
+    report = {'environment': environment(), 'seed': args.seed, 'results': results}
+
+    if args.pacing:
+        pacing = report['pacing'] = measure_pacing(args.pacing, seed=args.seed)
+        print(f"pacing: {pacing['achieved_fps']:.2f} fps of {pacing['target_fps']}, "
+              f"jitter {pacing['jitter_ms']:.2f} ms, p99 {pacing['p99_ms']:.2f} ms, "
+              f"missed {pacing['missed']} of {pacing['frames']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Bots that play the object simulation, recording their games as replays.
+
+These steer a :class:`~highway_havoc.simulation.SimulationState` the way
+the policies in :mod:`highway_havoc.batch` steer a batch of games, so a
+bot run can be watched or exported like any recorded game. A bot draws
+from its own ``random.Random`` and never from the spawner's.
+
+Bots can also race each other on one road, one car each, which plays the
+two-player mode headless::
+
+    python -m highway_havoc.bots dodge random --seed 3
+"""
+import argparse
+import math
+import random
+
+from .replay import ReplayRecorder
+from .settings import N_LANES
+from .simulation import SimulationState, FixedStepRunner
+from .store import COIN, SPIKE
+
+
+def idle_bot(state, rng, car=None):
+    return 0
+
+
+def random_bot(state, rng, car=None, change_chance=0.02):
+    """Change lane at random every so often"""
+    if rng.random() < change_chance:
+        return rng.choice((-1, 1))
+    return 0
+
+
+def dodge_bot(state, rng, car=None, lookahead=150):
+    """Steer one lane at a time away from spikes and towards coins"""
+    car, objects = car or state.car, state.objects
+    top, bottom = car.y - lookahead, car.y + car.height
+    best_lane, best_score = car.lane, -math.inf
+    for lane in range(N_LANES):
+        reach = abs(lane - car.lane)
+        if reach > 1:
+            continue  # only neighbouring lanes are one move away
+        kinds = {int(objects.kind[index]) for index in objects.lanes[lane] if top < objects.y[index] < bottom}
+        score = (COIN in kinds) - 10 * (SPIKE in kinds) - 0.1 * reach
+        if score > best_score:
+            best_lane, best_score = lane, score
+    return (best_lane > car.lane) - (best_lane < car.lane)
+
+
+BOTS = {
+    'idle': idle_bot,
+    'random': random_bot,
+    'dodge': dodge_bot,
+}
+
+
+def play_bot_game(name, seed=None, max_time=300.0, tuning=None, highway=False):
+    """Let bot ``name`` play one game and return it as replay bytes"""
+    bot = BOTS[name]
+    state = SimulationState(seed=seed, tuning=tuning, highway=highway)
+    runner = FixedStepRunner(state)
+    runner.reset()
+    recorder = ReplayRecorder()
+    recorder.start(runner)
+    rng = random.Random(state.seed)
+    max_ticks = round(max_time / runner.timestep)
+    while state.playing and runner.tick_count < max_ticks:
+        move = bot(state, rng)
+        if move:
+            runner.queue_input(move)
+        runner.tick()
+    return recorder.finish()
+
+
+def play_versus(names, seed=None, max_time=300.0, tuning=None, highway=False):
+    """Let the bots in ``names`` race on one road, one car each.
+
+    Returns the finished state; each player's score is in its
+    ``game_states`` entry.
+    """
+    bots = [BOTS[name] for name in names]
+    state = SimulationState(seed=seed, tuning=tuning, highway=highway, players=len(bots))
+    runner = FixedStepRunner(state)
+    runner.reset()
+    rngs = [random.Random(f'{state.seed}:{player}') for player in range(len(bots))]
+    max_ticks = round(max_time / runner.timestep)
+    while state.playing and runner.tick_count < max_ticks:
+        for player, (bot, car, rng) in enumerate(zip(bots, state.cars, rngs)):
+            move = bot(state, rng, car)
+            if move:
+                runner.queue_input(move, player)
+        runner.tick()
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Race bots against each other on one road, headless.")
+    parser.add_argument('bots', nargs='+', choices=sorted(BOTS), help="one bot per car")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-time', type=float, default=300.0, help="seconds of game at most")
+    parser.add_argument('--highway', action='store_true', help="race on a planned highway")
+    args = parser.parse_args(argv)
+
+    state = play_versus(args.bots, args.seed, args.max_time, highway=args.highway)
+    print(f"{state.time:.1f} s, seed {args.seed}, {state.spawner.stats.placed} coins and spikes spawned")
+    for player, (name, car, game_state) in enumerate(zip(args.bots, state.cars, state.game_states)):
+        print(f"P{player + 1} {name:8} money {game_state.money:5}, coins {game_state.coins_collected:4}, "
+              f"spikes {game_state.spikes_hit:3}, distance {car.distance:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Frame clocks.
+
+A clock is sampled once per frame with ``tick()`` and everything that needs
+the current time during that frame reads ``clock.now`` instead of calling
+``time.time()`` itself. ``SystemClock`` follows real time for the pygame
+front end; ``SimulatedClock`` only moves when ticked, so headless games can
+be fast-forwarded as quickly as the CPU allows.
+
+``FrameScheduler`` paces the pygame loop to the target frame rate.
+"""
+import time
+
+from .lazy import lazy_import
+from .settings import FPS
+
+asyncio = lazy_import('asyncio')  # headless games never wait for a frame
+
+
+class SystemClock:
+    """Wall clock, sampled once per tick"""
+    def __init__(self):
+        self.now = time.perf_counter()
+        self.delta_time = 0.0
+
+    def tick(self):
+        current_time = time.perf_counter()
+        self.delta_time = current_time - self.now
+        self.now = current_time
+        return self.delta_time
+
+
+class SimulatedClock:
+    """Clock that advances by a given step instead of following real time"""
+    def __init__(self, start=0.0, step=1.0 / FPS):
+        self.now = start
+        self.step = step
+        self.delta_time = 0.0
+
+    def reset(self, start=0.0):
+        self.now = start
+        self.delta_time = 0.0
+
+    def tick(self, delta_time=None):
+        if delta_time is None:
+            delta_time = self.step
+        self.delta_time = delta_time
+        self.now += delta_time
+        return delta_time
+
+
+class FrameScheduler:
+    """Paces the game loop to ``fps`` frames a second.
+
+    It is the only thing in the loop that waits. Each frame is due one
+    frame time after the previous one, and :meth:`wait` sleeps only for
+    what is left of that budget. It always yields to asyncio at least once,
+    which the browser build needs to stay responsive. A frame that starts
+    after its deadline counts as missed. If the loop falls more than a
+    whole frame behind, the schedule restarts from now instead of rushing
+    through the frames it lost.
+
+    ``poll``, if given to :meth:`wait`, is called about every
+    ``poll_interval`` seconds while waiting. If it returns True the frame
+    starts at once and the next one keeps its usual deadline.
+    """
+    def __init__(self, fps=FPS, clock=None, sleep=None, timer=time.perf_counter, poll_interval=0.001):
+        self.frame_time = 1.0 / fps
+        self.poll_interval = poll_interval
+        self.clock = clock if clock is not None else SystemClock()
+        self.sleep = sleep if sleep is not None else asyncio.sleep
+        self.timer = timer
+        self.deadline = None
+        self.frames = 0
+        self.missed = 0
+        self.worst_lateness = 0.0
+
+    async def wait(self, poll=None):
+        """Wait for the next frame and return the time since the last one"""
+        now = self.timer()
+        if self.deadline is None:
+            self.deadline = now
+        lateness = now - self.deadline
+        if lateness > 0:
+            self.missed += 1
+            self.worst_lateness = max(self.worst_lateness, lateness)
+            if lateness > self.frame_time:
+                self.deadline = now
+            await self.sleep(0)
+        elif poll is None:
+            await self.sleep(-lateness)
+        else:
+            await self.sleep(0)
+            while not poll():
+                remaining = self.deadline - self.timer()
+                if remaining <= 0:
+                    break
+                await self.sleep(min(remaining, self.poll_interval))
+            else:
+                # Woken early; the next frame is still due at the deadline
+                self.frames += 1
+                return self.clock.tick()
+        self.deadline += self.frame_time
+        self.frames += 1
+        return self.clock.tick()
@@ -0,0 +1,127 @@
+"""Closed-form timeline of the car's boost and slowdown effects.
+
+Every effect holds its full strength for a while and then fades out over
+a few seconds, so its pull on the car's speed is piecewise linear in time
+and its push on the car's position offset is piecewise cubic. The
+timeline adds the pieces of all live effects into one polynomial per
+stretch of time between breakpoints. The speed or offset at any time
+after the oldest live effect started is then a bisect and a polynomial,
+however many effects overlap. Nothing is walked frame by frame.
+"""
+import math
+from bisect import bisect_right
+
+
+class EffectShape:
+    """How long an effect holds and fades, and which way it pushes speed"""
+    def __init__(self, hold, fade, speed_sign):
+        self.hold = hold
+        self.fade = fade
+        self.speed_sign = speed_sign
+
+    @property
+    def duration(self):
+        return self.hold + self.fade
+
+
+BOOST = EffectShape(hold=3, fade=4, speed_sign=1)
+SLOWDOWN = EffectShape(hold=2, fade=4, speed_sign=-1)
+
+_ZERO = (0.0,) * 6  # speed c0, c1 and offset c0..c3
+
+
+def _compose(coeffs, scale, shift):
+    """Coefficients in tau of the polynomial ``coeffs`` in (scale * tau + shift)"""
+    result = [0.0] * 4
+    power = [1.0, 0.0, 0.0, 0.0]
+    for c in coeffs:
+        for i in range(4):
+            result[i] += c * power[i]
+        # power *= (scale * tau + shift)
+        power = [shift * power[0]] + [shift * power[i] + scale * power[i - 1] for i in range(1, 4)]
+    return result
+
+
+def _pieces(shape, start, amount, origin):
+    """(begin, end, coefficients) of the hold and fade pieces of one effect"""
+    sign = shape.speed_sign
+    a = start - origin
+    b = a + shape.hold
+
+    # Hold: full strength, offset easing out as (1 - u^2) with u = (tau - a) / hold
+    offset = _compose((-sign * amount * 10, 0.0, sign * amount * 10), 1 / shape.hold, -a / shape.hold)
+    yield a, b, (sign * amount, 0.0, *offset)
+
+    # Fade: strength A(1 - p), offset -sign*5*A(1 - p)(1 - (1 - p)^2) = -sign*5*A(2p - 3p^2 + p^3)
+    scale, shift = 1 / shape.fade, -b / shape.fade
+    speed = _compose((sign * amount, -sign * amount), scale, shift)
+    offset = _compose((0.0, -sign * amount * 10, sign * amount * 15, -sign * amount * 5), scale, shift)
+    yield b, b + shape.fade, (speed[0], speed[1], *offset)
+
+
+class EffectTimeline:
+    def __init__(self):
+        self.effects = []  # (shape, start, amount)
+        self.clear()
+
+    def clear(self):
+        self.effects = []
+        self.origin = 0.0
+        self.times = []
+        self.segments = []
+        self.latest_start = -math.inf
+        self._stale = False
+
+    def __len__(self):
+        return len(self.effects)
+
+    def add(self, shape, start, amount):
+        """Start an effect, forgetting the ones that ended before it.
+
+        The breakpoints are rebuilt on the next query, so adding several
+        effects at once only rebuilds them once.
+        """
+        self.effects.append((shape, start, amount))
+        self.latest_start = max(self.latest_start, start)
+        self._stale = True
+
+    def _build(self):
+        self.effects = [effect for effect in self.effects if effect[1] + effect[0].duration > self.latest_start]
+        # Coefficients are in time since the oldest live effect, which keeps
+        # the powers of tau small
+        self.origin = min(start for _, start, _ in self.effects)
+        deltas = {}
+        for shape, start, amount in self.effects:
+            for begin, end, coeffs in _pieces(shape, start, amount, self.origin):
+                into = deltas.setdefault(begin, [0.0] * 6)
+                out = deltas.setdefault(end, [0.0] * 6)
+                for i, c in enumerate(coeffs):
+                    into[i] += c
+                    out[i] -= c
+
+        self.times = sorted(deltas)
+        self.segments = []
+        total = [0.0] * 6
+        for time in self.times[:-1]:
+            total = [t + d for t, d in zip(total, deltas[time])]
+            self.segments.append(tuple(total))
+        self._stale = False
+
+    def _segment(self, time):
+        if self._stale:
+            self._build()
+        tau = time - self.origin
+        i = bisect_right(self.times, tau) - 1
+        if i < 0 or i >= len(self.segments):
+            return tau, _ZERO
+        return tau, self.segments[i]
+
+    def speed_change(self, time):
+        """Total speed added (or taken away) by the effects at ``time``"""
+        tau, c = self._segment(time)
+        return c[0] + c[1] * tau
+
+    def offset_rate(self, time):
+        """How fast the effects push the car's position offset at ``time``"""
+        tau, c = self._segment(time)
+        return ((c[5] * tau + c[4]) * tau + c[3]) * tau + c[2]
@@ -0,0 +1,280 @@
+from .clock import SimulatedClock
+from .effects import BOOST, SLOWDOWN, EffectTimeline
+from .lazy import lazy_import
+from .particles import FloatingTexts
+from .settings import SCREEN_HEIGHT, ROAD_X, LANE_WIDTH, MENU_STATE, Tuning
+from .store import COIN, SPIKE, FallingObjectStore
+
+pygame = lazy_import('pygame')  # only needed to draw
+
+
+class GameState:
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else SimulatedClock()
+        self.money = 0
+        self.car_type = None
+        self.floating_texts = FloatingTexts(clock=self.clock)
+
+    def add_score(self, money, x=None, y=None, color='white'):
+        self.money += money
+        if x is not None and y is not None:
+            self.add_floating_text(f"+{money}", x, y, color)
+
+    def add_floating_text(self, text, x, y, color='white', duration=2.0):
+        self.floating_texts.add(text, x, y, color, duration)
+
+    def update_floating_texts(self, delta_time):
+        self.floating_texts.update(delta_time)
+
+class GameObject:
+    __slots__ = ('x', 'y', 'width', 'height')
+
+    def __init__(self, x, y, width, height):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def draw(self, surface):
+        pygame.draw.rect(surface, (255, 0, 0), (self.x, self.y, self.width, self.height))
+
+    def update(self):
+        pass
+
+    def get_position(self):
+        return (self.x, self.y)
+
+def _slot_field(name, flag=None):
+    """Property reading and writing one column of the object's store slot.
+
+    Writing a field named with ``flag`` sets that store flag, so the store
+    knows its lane index may be out of date.
+    """
+    def get(self):
+        return float(getattr(self.store, name)[self.index])
+
+    def set(self, value):
+        getattr(self.store, name)[self.index] = value
+        if flag is not None:
+            setattr(self.store, flag, True)
+    return property(get, set)
+
+class FallingObjects:
+    """A coin or spike whose fields live in a slot of a FallingObjectStore.
+
+    Subclasses list FallingObjects before GameObject so these fields take
+    the place of GameObject's own slots.
+    """
+    __slots__ = ()
+
+    x = _slot_field('x', 'unsorted')
+    y = _slot_field('y', 'unsorted')
+    width = _slot_field('width')
+    height = _slot_field('height')
+    fall_speed = _slot_field('fall_speed', 'fall_speeds_differ')
+
+    def __init__(self, fall_speed=5):
+        self.fall_speed = fall_speed
+
+    @classmethod
+    def from_slot(cls, store, index):
+        obj = cls.__new__(cls)
+        obj.store = store
+        obj.index = index
+        return obj
+
+    def _attach(self, kind, x, y, width, height, store):
+        self.store = store if store is not None else FallingObjectStore(1)
+        self.index = self.store.add(kind, x, y, width, height)
+        self.store.views[(self.index, kind)] = self
+
+    def update_fall_speed(self, new_speed):
+        self.fall_speed = new_speed
+
+    def update_position(self, delta_time):
+        self.y += self.fall_speed * 50 * delta_time
+        if self.y > SCREEN_HEIGHT:
+            self.store.set_alive(self.index, False)
+
+class player(GameObject):
+    def __init__(self, x, y, width, height):
+        super().__init__(x, y, width, height)
+        self.speed = 5
+        self.color = 'tomato3'
+        self.coin_timers = []
+        self.spike_timers = []
+
+
+class Car(GameObject):
+    def __init__(self, x, y, width, height, player_id, color='blue', clock=None):
+        super().__init__(x, y, width, height)
+        self.clock = clock if clock is not None else SimulatedClock()
+        self.player_id = player_id
+        self.speed = 5
+        self.base_speed = 5
+        self.color = color
+        self.effects = EffectTimeline()
+        self.lane = self.start_lane
+        self.target_x = ROAD_X + self.lane * LANE_WIDTH + LANE_WIDTH // 2 - self.width // 2
+        self.flash_color = None
+        self.flash_end_time = 0
+        self.last_coin_time = 0
+        self.last_spike_time = 0
+        self.last_spike_decrease = 0
+        self.distance = 0
+        self.position_offset = 0
+
+    @property
+    def start_lane(self):
+        """Player 1 starts in lane 1, player 2 in lane 2, then the outer lanes"""
+        return (1, 2, 0, 3)[(self.player_id - 1) % 4]
+
+    def reset(self):
+        """Reset car for new game"""
+        self.speed = 5
+        self.base_speed = 5
+        self.effects.clear()
+        self.lane = self.start_lane
+        self.target_x = ROAD_X + self.lane * LANE_WIDTH + LANE_WIDTH // 2 - self.width // 2
+        self.x = self.target_x
+        self.flash_color = None
+        self.flash_end_time = 0
+        self.last_coin_time = 0
+        self.last_spike_time = 0
+        self.last_spike_decrease = 0
+        self.distance = 0
+        self.position_offset = 0
+
+    def move(self, direction):
+        new_lane = self.lane + direction
+        if 0 <= new_lane < 4:
+            self.lane = new_lane
+            self.target_x = ROAD_X + self.lane * LANE_WIDTH + LANE_WIDTH // 2 - self.width // 2
+
+    def update_speed_and_position(self, delta_time):
+        current_time = self.clock.now
+        self.speed = self.speed_at(current_time)
+
+        # Gradual position offset for boost and spike effects
+        self.position_offset = self.effects.offset_rate(current_time) * delta_time
+        self.position_offset = max(min(self.position_offset, 0), -100)
+        self.distance += self.speed * delta_time * 10
+
+    def speed_at(self, time):
+        """Speed the car's current effects give it at ``time``, no frames needed"""
+        return max(self.base_speed + self.effects.speed_change(time), 0)  # Allow speed to reach 0
+
+    def update_lane_position(self):
+        """Slide the car towards the lane it is steering into"""
+        if abs(self.x - self.target_x) > 1:
+            self.x += (self.target_x - self.x) * 0.1
+
+    def draw(self, screen):
+        visual_y = self.y + self.position_offset
+        if self.clock.now < self.flash_end_time:
+            pygame.draw.rect(screen, self.flash_color, (self.x, visual_y, self.width, self.height))
+        else:
+            pygame.draw.rect(screen, self.color, (self.x, visual_y, self.width, self.height))
+
+    def flash_white(self):
+        self.flash_color = 'white'
+        self.flash_end_time = self.clock.now + 0.2
+
+    def flash_red(self):
+        self.flash_color = 'red'
+        self.flash_end_time = self.clock.now + 0.2
+
+class Coin(FallingObjects, GameObject):
+    __slots__ = ('store', 'index')
+    color = 'yellow'
+
+    def __init__(self, x, y, width=20, height=20, store=None):
+        self._attach(COIN, x, y, width, height, store)
+
+    @property
+    def collected(self):
+        return not self.store.alive[self.index]
+
+    @collected.setter
+    def collected(self, value):
+        self.store.set_alive(self.index, not value)
+
+    def collect(self, player_car, game_state):
+        if self.collected:
+            return
+        current_time = game_state.clock.now
+        tuning = game_state.tuning
+        combo = current_time - player_car.last_coin_time <= 1
+        boost_amount = tuning.coin_combo_boost if combo else tuning.coin_boost
+        player_car.effects.add(BOOST, current_time, boost_amount)
+        player_car.last_coin_time = current_time
+        self.collected = True
+        game_state.coins_collected += 1
+
+        # Simple base points without combo bonuses
+        base_points = 5 if combo else 10
+        game_state.add_score(base_points, self.x, self.y, 'yellow')
+        player_car.flash_white()
+
+    def draw(self, screen):
+        if not self.collected:
+            pygame.draw.circle(screen, self.color, (self.x + self.width // 2, self.y + self.height // 2), self.width // 2)
+
+class Spikes(FallingObjects, GameObject):
+    __slots__ = ('store', 'index')
+    color = 'purple'
+
+    def __init__(self, x, y, width=25, height=25, store=None):
+        self._attach(SPIKE, x, y, width, height, store)
+
+    @property
+    def hit(self):
+        return not self.store.alive[self.index]
+
+    @hit.setter
+    def hit(self, value):
+        self.store.set_alive(self.index, not value)
+
+    def collect(self, player_car, game_state):
+        if self.hit:
+            return
+        current_time = game_state.clock.now
+        decrease_amount = game_state.tuning.spike_decrease
+        if current_time - player_car.last_spike_time <= 1:
+            decrease_amount = player_car.last_spike_decrease * game_state.tuning.spike_combo_factor
+        player_car.effects.add(SLOWDOWN, current_time, decrease_amount)
+        player_car.last_spike_time = current_time
+        player_car.last_spike_decrease = decrease_amount
+        self.hit = True
+        game_state.spikes_hit += 1
+
+        # Simple money deduction without combo breaking
+        game_state.add_floating_text("-25", self.x, self.y, 'red')
+        game_state.money = max(0, game_state.money - 25)
+        player_car.flash_red()
+
+    def draw(self, screen):
+        if not self.hit:
+            points = [(self.x + self.width // 2, self.y),
+                      (self.x, self.y + self.height),
+                      (self.x + self.width, self.y + self.height)]
+            pygame.draw.polygon(screen, self.color, points)
+
+# Simplified GameState class without combo, level, and achievements
+class SimplifiedGameState(GameState):
+    def __init__(self, clock=None, tuning=None):
+        super().__init__(clock)
+        self.tuning = tuning if tuning is not None else Tuning()
+        self.high_score = 0
+        self.coins_collected = 0
+        self.spikes_hit = 0
+        self.total_distance = 0
+        self.current_state = MENU_STATE
+
+    def reset_game(self):
+        """Reset game state for a new game"""
+        self.money = 0
+        self.coins_collected = 0
+        self.spikes_hit = 0
+        self.total_distance = 0
+        self.floating_texts.clear()
@@ -0,0 +1,456 @@
+"""The pygame front end: window, menus, input and the main loop.
+
+Nothing here touches pygame until :meth:`Game.open_window`, so importing
+this module is cheap and opens no window. Only the display is started
+with the window; fonts start with the first text drawn, and the mixer
+opens on the asset loader thread while the menu is already showing.
+"""
+import argparse
+import math
+import os
+import platform
+import time
+
+from .assets import AssetManager, asset_path
+from .audio import SoundEffects, play_music
+from .clock import FrameScheduler, SystemClock
+from .latency import InputQueue, LatencyTracker
+from .lazy import lazy_import
+from .profiler import FrameProfiler, ProfilerOverlay
+from .render import Hud, draw_playing
+from .replay import Replay, ReplayPlayer, ReplayRecorder, default_replay_dir
+from .road import RoadLayer
+from .settings import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, MENU_STATE, PLAYING_STATE, GAME_OVER_STATE,
+    FPS,
+)
+from .simulation import SimulationState, FixedStepRunner
+from .text import get_font
+
+asyncio = lazy_import('asyncio')  # only needed once the game runs
+pygame = lazy_import('pygame')
+
+SOUNDS = {'coin': "coinsound.wav", 'spike': "spikesound.wav"}
+MUSIC = "f1v8.mp3"
+
+# direction of each steering key, and which player it steers when two play
+KEYS = {'a': (-1, 0), 'd': (1, 0), 'left': (-1, 1), 'right': (1, 1)}
+
+
+def compose_start_screen(screen, players=1):
+    screen.fill((20, 20, 40))  # Dark blue background
+
+    # Title
+    title_font = get_font(72)
+    title_text = title_font.render("HIGHWAY HAVOC", True, (255, 255, 0))
+    title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 150))
+    screen.blit(title_text, title_rect)
+
+    # Subtitle
+    subtitle_font = get_font(36)
+    subtitle_text = subtitle_font.render("Race through traffic and collect coins!", True, (255, 255, 255))
+    subtitle_rect = subtitle_text.get_rect(center=(SCREEN_WIDTH // 2, 200))
+    screen.blit(subtitle_text, subtitle_rect)
+
+    # Instructions
+    instruction_font = get_font(28)
+    if players == 1:
+        controls = ["A/Left Arrow - Move Left", "D/Right Arrow - Move Right", ""]
+    else:
+        controls = ["Player 1: A/D - Move Left/Right", "Player 2: Left/Right Arrow", ""]
+    instructions = [
+        "Controls:",
+        *controls,
+        "Collect coins to boost speed!",
+        "Avoid spikes - they slow you down!",
+        "Game ends when speed reaches 0!"
+    ]
+
+    start_y = 280
+    for i, instruction in enumerate(instructions):
+        color = (255, 255, 255) if instruction != "Controls:" else (255, 255, 0)
+        text = instruction_font.render(instruction, True, color)
+        text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, start_y + i * 30))
+        screen.blit(text, text_rect)
+
+    # Start button
+    button_font = get_font(48)
+    button_text = button_font.render("PRESS SPACE TO START", True, (0, 255, 0))
+    button_rect = button_text.get_rect(center=(SCREEN_WIDTH // 2, 500))
+    screen.blit(button_text, button_rect)
+    return button_rect, 3
+
+def compose_game_over_screen(screen, game_state):
+    screen.fill((40, 20, 20))  # Dark red background
+
+    # Game Over title
+    title_font = get_font(72)
+    title_text = title_font.render("GAME OVER", True, (255, 100, 100))
+    title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 150))
+    screen.blit(title_text, title_rect)
+
+    # Final Score
+    score_font = get_font(48)
+    score_text = score_font.render(f"Final Money: ${game_state.money:,}", True, (255, 255, 0))
+    score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, 220))
+    screen.blit(score_text, score_rect)
+
+    # High Score
+    if game_state.money > game_state.high_score:
+        game_state.high_score = game_state.money
+        high_score_text = score_font.render("NEW HIGH SCORE!", True, (0, 255, 255))
+    else:
+        high_score_text = score_font.render(f"High Score: ${game_state.high_score:,}", True, (255, 255, 255))
+    high_score_rect = high_score_text.get_rect(center=(SCREEN_WIDTH // 2, 270))
+    screen.blit(high_score_text, high_score_rect)
+
+    # Stats
+    stats_font = get_font(32)
+    stats = [
+        f"Distance Traveled: {int(game_state.total_distance)}",
+        f"Coins Collected: {game_state.coins_collected}",
+        f"Spikes Hit: {game_state.spikes_hit}"
+    ]
+
+    start_y = 340
+    for i, stat in enumerate(stats):
+        text = stats_font.render(stat, True, (255, 255, 255))
+        text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, start_y + i * 35))
+        screen.blit(text, text_rect)
+
+    # Restart instructions
+    restart_font = get_font(36)
+    restart_text = restart_font.render("PRESS SPACE TO PLAY AGAIN", True, (0, 255, 0))
+    restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, 480))
+    screen.blit(restart_text, restart_rect)
+
+    quit_text = restart_font.render("PRESS ESC TO QUIT", True, (255, 255, 255))
+    quit_rect = quit_text.get_rect(center=(SCREEN_WIDTH // 2, 520))
+    screen.blit(quit_text, quit_rect)
+    return restart_rect, 2
+
+def compose_versus_over_screen(screen, sim):
+    screen.fill((40, 20, 20))
+
+    title_font = get_font(72)
+    title_text = title_font.render("GAME OVER", True, (255, 100, 100))
+    screen.blit(title_text, title_text.get_rect(center=(SCREEN_WIDTH // 2, 120)))
+
+    # Most money wins; a tie goes to whoever drove further
+    results = [(state.money, state.total_distance) for state in sim.game_states]
+    best = max(results)
+    winners = [player for player, result in enumerate(results) if result == best]
+    score_font = get_font(48)
+    headline = f"PLAYER {winners[0] + 1} WINS!" if len(winners) == 1 else "IT'S A TIE!"
+    headline_text = score_font.render(headline, True, (255, 255, 0))
+    screen.blit(headline_text, headline_text.get_rect(center=(SCREEN_WIDTH // 2, 190)))
+
+    stats_font = get_font(32)
+    for player, (car, state) in enumerate(zip(sim.cars, sim.game_states)):
+        stat = (f"P{player + 1}: ${state.money:,}  Distance {int(state.total_distance)}  "
+                f"Coins {state.coins_collected}  Spikes {state.spikes_hit}")
+        text = stats_font.render(stat, True, pygame.Color(car.color))
+        screen.blit(text, text.get_rect(center=(SCREEN_WIDTH // 2, 270 + player * 40)))
+
+    restart_font = get_font(36)
+    restart_text = restart_font.render("PRESS SPACE TO PLAY AGAIN", True, (0, 255, 0))
+    restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, 480))
+    screen.blit(restart_text, restart_rect)
+
+    quit_text = restart_font.render("PRESS ESC TO QUIT", True, (255, 255, 255))
+    screen.blit(quit_text, quit_text.get_rect(center=(SCREEN_WIDTH // 2, 520)))
+    return restart_rect, 2
+
+class CachedScreen:
+    """A static screen composed once, with only its pulsing button redrawn"""
+    def __init__(self, compose):
+        self.compose = compose
+        self.surface = None
+        self.button_rect = None
+        self.border_width = 0
+        self.on_screen = False
+
+    def invalidate(self):
+        """Compose the screen again next time, e.g. after a new game"""
+        self.surface = None
+
+    def draw(self, screen, frame_clock, *args):
+        """Draw the screen and return the rects that need updating"""
+        if self.surface is None:
+            self.surface = pygame.Surface(screen.get_size()).convert()
+            self.button_rect, self.border_width = self.compose(self.surface, *args)
+            self.on_screen = False
+        if self.on_screen:
+            screen.blit(self.surface, self.button_rect, self.button_rect)
+            dirty = [self.button_rect]
+        else:
+            screen.blit(self.surface, (0, 0))
+            dirty = [screen.get_rect()]
+            self.on_screen = True
+
+        # Pulsing effect for the button
+        pulse = abs(math.sin(frame_clock.now * 3)) * 0.3 + 0.7
+        pygame.draw.rect(screen, (0, int(255 * pulse), 0), self.button_rect, self.border_width)
+        return dirty
+
+def draw_loading_bar(screen, progress):
+    rect = pygame.Rect(SCREEN_WIDTH // 2 - 150, 550, 300, 12)
+    screen.fill((20, 20, 40), rect)
+    pygame.draw.rect(screen, (80, 80, 120), rect, 1)
+    screen.fill((255, 255, 0), (rect.x + 2, rect.y + 2, int((rect.width - 4) * progress), rect.height - 4))
+    return rect
+
+
+def threads_available():
+    return platform.system() != "Emscripten"  # the browser build has no threads
+
+
+class Game:
+    """One window's worth of game: simulation, screens, sound and timing.
+
+    ``started_at`` is the ``time.perf_counter()`` reading the startup
+    times are measured from, normally taken before pygame was imported.
+    Every game is recorded into ``record_dir`` if it is given. Given a
+    ``replay`` instead, the window shows that game being played back.
+    With ``highway`` set, games are played on a planned highway whose
+    chunks are built in the background. Two ``players`` share the
+    keyboard, one on A/D and one on the arrows; their games aren't
+    recorded, as replays hold one car.
+    """
+    def __init__(self, low_latency=False, profile_path=None, started_at=None, record_dir=None, replay=None,
+                 highway=False, players=1):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.screen = None
+        if replay is not None:
+            self.player = ReplayPlayer(replay)
+            self.sim = self.player.state
+            self.runner = self.player.runner
+        else:
+            self.player = None
+            self.sim = SimulationState(highway=highway and ('threaded' if threads_available() else True),
+                                       players=players)
+            self.runner = FixedStepRunner(self.sim)
+        self.record_dir = record_dir
+        self.recorder = ReplayRecorder()
+        self.game_state = self.sim.game_state
+        self.frame_clock = SystemClock()
+        self.scheduler = FrameScheduler(FPS, self.frame_clock)
+        self.road = RoadLayer()
+        self.hud = Hud()
+        self.start_screen = CachedScreen(compose_start_screen)
+        if self.sim.players == 1:
+            self.game_over_screen = CachedScreen(compose_game_over_screen)
+        else:
+            self.game_over_screen = CachedScreen(compose_versus_over_screen)
+
+        # F3 shows where frame time goes; a profile path records from the
+        # start and writes the frames there (.csv or .json) on exit
+        self.profiler = FrameProfiler()
+        self.profiler_overlay = ProfilerOverlay(self.profiler, self.scheduler)
+        self.show_profiler = False
+        self.profile_path = profile_path
+        self.set_profiling(profile_path is not None)
+
+        # Key presses are stamped as they arrive and timed until the car
+        # moves on screen. In low-latency mode a key press starts the next
+        # frame at once.
+        self.input_queue = InputQueue(wake_on_input=low_latency)
+        self.latency = LatencyTracker()
+
+        # Sounds and fonts load in the background while the menu shows
+        self.assets = AssetManager(SOUNDS)
+        self.sound_effects = SoundEffects()
+        self.assets_installed = False
+        self.first_frame_time = None
+
+    def set_profiling(self, enabled):
+        self.profiler.enabled = enabled
+        self.sim.profiler = self.profiler if enabled else None
+
+    def open_window(self):
+        """Start the display, and only the display, and open the window"""
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Highway Havoc")
+
+    def start_new_game(self):
+        if self.player is not None:
+            self.player.restart()
+        else:
+            self.save_recording()
+            self.runner.reset()
+            if self.record_dir is not None and self.sim.players == 1:
+                self.recorder.start(self.runner)
+        self.latency.discard_waiting()
+        self.game_over_screen.invalidate()
+
+    def save_recording(self):
+        """Write out the game being recorded, if there is one"""
+        if not self.recorder.recording:
+            return None
+        path = os.path.join(self.record_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.sim.seed:08x}.hhr")
+        try:
+            self.recorder.save(path)
+        except OSError as error:
+            print(f"could not save the replay: {error}")
+            return None
+        return path
+
+    def install_assets(self):
+        """Hand the loaded sounds to the game and start the music.
+
+        If the loader failed, the game goes on with whatever it loaded;
+        effects that never loaded stay silent and fonts load when drawn.
+        """
+        if self.assets.error is not None:
+            print(f"could not load every asset, playing without the rest: {self.assets.error}")
+        for name, sound in self.assets.sounds.items():
+            self.sound_effects.add(name, sound, voices=2)
+        if not play_music(asset_path(MUSIC)):
+            print(f"{MUSIC} is missing or unreadable, playing without music")
+        self.assets_installed = True
+        self.start_screen.on_screen = False  # redraw the menu without the loading bar
+
+    def handle_events(self):
+        """Act on the input since the last frame; False once the game should close"""
+        game_state = self.game_state
+        for pressed_at, event in self.input_queue.drain():
+            if event.type == pygame.QUIT:
+                return False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.show_profiler = not self.show_profiler
+                self.set_profiling(self.show_profiler or self.profile_path is not None)
+                self.start_screen.on_screen = self.game_over_screen.on_screen = False
+            elif event.type == pygame.KEYDOWN:
+                if game_state.current_state == MENU_STATE:
+                    if event.key == pygame.K_SPACE:
+                        self.start_new_game()
+                elif game_state.current_state == PLAYING_STATE and self.player is None:
+                    steer = KEYS.get(pygame.key.name(event.key))
+                    if steer is not None:
+                        direction, player = steer
+                        self.runner.queue_input(direction, player if self.sim.players > 1 else 0)
+                        self.latency.pressed(pressed_at)
+                elif game_state.current_state == GAME_OVER_STATE:
+                    if event.key == pygame.K_SPACE:
+                        self.start_new_game()
+                    elif event.key == pygame.K_ESCAPE:
+                        return False
+        return True
+
+    def draw_frame(self, delta_time):
+        """Advance and draw one frame; returns the rects to update, None for all"""
+        screen, game_state, profiler = self.screen, self.game_state, self.profiler
+        dirty_rects = None
+        if game_state.current_state == MENU_STATE:
+            dirty_rects = self.start_screen.draw(screen, self.frame_clock, self.sim.players)
+            if not self.assets.done:
+                dirty_rects.append(draw_loading_bar(screen, self.assets.progress))
+            profiler.mark('ui')
+
+        elif game_state.current_state == PLAYING_STATE:
+            for kind, _ in self.runner.advance(delta_time, eager=self.input_queue.wake_on_input):
+                self.sound_effects.play(kind)  # 'coin' or 'spike'
+            if not self.runner.pending_inputs:
+                self.latency.ticked()
+            if self.player is not None and self.player.finished:
+                game_state.current_state = GAME_OVER_STATE
+            elif not self.sim.playing:
+                self.save_recording()
+
+            # Draw game
+            self.start_screen.on_screen = self.game_over_screen.on_screen = False
+            draw_playing(screen, self.sim, self.road, self.hud, profiler)
+
+        elif game_state.current_state == GAME_OVER_STATE:
+            dirty_rects = self.game_over_screen.draw(
+                screen, self.frame_clock, game_state if self.sim.players == 1 else self.sim)
+            profiler.mark('ui')
+
+        if self.show_profiler:
+            overlay_rect = self.profiler_overlay.draw(screen)
+            if dirty_rects is not None:
+                dirty_rects.append(overlay_rect)
+            profiler.skip()
+        return dirty_rects
+
+    async def run(self):
+        if self.screen is None:
+            self.open_window()
+        if self.player is not None:
+            self.start_new_game()
+        self.assets.start(threaded=threads_available())
+        running = True
+        while running:
+            delta_time = await self.scheduler.wait(self.input_queue.poll)
+            self.profiler.begin_frame()
+            running = self.handle_events()
+            self.profiler.mark('events')
+
+            if self.assets.done and not self.assets_installed:
+                self.install_assets()
+            dirty_rects = self.draw_frame(delta_time)
+
+            if dirty_rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty_rects)
+            self.latency.presented()
+            if self.first_frame_time is None:
+                self.first_frame_time = time.perf_counter() - self.started_at
+            self.profiler.mark('flip')
+            self.profiler.end_frame()
+
+    def startup_report(self):
+        self.assets.wait()
+        assets_ready = self.assets.started_at - self.started_at + self.assets.load_time
+        lines = [f"first frame {self.first_frame_time * 1000:.0f} ms after start, "
+                 f"assets ready {assets_ready * 1000:.0f} ms after start "
+                 f"({'warm' if self.assets.warm else 'cold'} cache)"]
+        if self.assets.missing:
+            lines.append(f"missing: {', '.join(self.assets.missing)}")
+        return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Highway Havoc")
+    parser.add_argument('--profile', metavar='PATH', help="time every frame and write the timings to PATH (.csv or .json)")
+    parser.add_argument('--low-latency', action='store_true', help="start a frame as soon as a key is pressed")
+    parser.add_argument('--latency', action='store_true', help="print the input latency of the session on exit")
+    parser.add_argument('--startup', action='store_true', help="print how long startup and asset loading took")
+    parser.add_argument('--replay', metavar='PATH', help="watch a recorded game instead of playing")
+    parser.add_argument('--record', metavar='DIR', default=default_replay_dir(),
+                        help="where every game is recorded (default: %(default)s)")
+    parser.add_argument('--no-record', dest='record', action='store_const', const=None, help="don't record games")
+    parser.add_argument('--highway', action='store_true', help="drive a highway planned in seeded chunks")
+    parser.add_argument('--players', type=int, choices=(1, 2), default=1,
+                        help="two players share the keyboard and the road")
+    return parser.parse_args(argv)
+
+
+def main(argv=None, started_at=None):
+    """Play until the window is closed, then print what was asked for"""
+    args = parse_args(argv)
+    replay = Replay.load(args.replay) if args.replay is not None else None
+    game = Game(low_latency=args.low_latency, profile_path=args.profile, started_at=started_at,
+                record_dir=args.record, replay=replay, highway=args.highway,
+                players=args.players)
+    try:
+        asyncio.run(game.run())
+    finally:
+        game.save_recording()  # a game still going when the window closed
+        game.assets.wait()  # the loader may still be using the mixer
+        pygame.quit()
+    if args.latency:
+        print(game.latency.report())
+    if args.startup:
+        print(game.startup_report())
+    if args.profile is not None:
+        game.profiler.dump(args.profile)
+        print(f"missed {game.scheduler.missed} of {game.scheduler.frames} frame deadlines, "
+              f"worst by {game.scheduler.worst_lateness * 1000:.1f} ms")
+    return game
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""The highway ahead, generated in seeded chunks of road.
+
+Instead of rolling a spawn every interval, a game can drive down a
+highway planned ahead of it. The road is cut into chunks of
+``CHUNK_LENGTH`` distance units. Each chunk is a list of rows at set
+distances, and each row holds the coins and spikes that drop, in fixed
+lanes, when the car's distance reaches it. Rows come from formations
+placed one after another: a lone pickup, a trail of coins, a zigzag, a
+coin baiting a spike, and walls of spikes with a gap. Further down the
+road the rows get closer together and spikes get more common, up to a
+cap.
+
+A chunk depends only on the seed, its index and the two tuning constants
+it uses, so chunks can be made in any order and anywhere. They are kept
+in a process-wide :class:`ChunkCache` shared by every game on the same
+seed. :class:`HighwayStream` has a background thread build the next few
+chunks while the current one is being driven, so the game thread only
+compares its distance with the next row's.
+
+:func:`validate_chunk` checks the rules a chunk must keep, and running
+the module checks and times a stretch of highway::
+
+    python -m highway_havoc.highway --seed 3 --chunks 200
+"""
+import argparse
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from .lazy import lazy_import
+from .settings import N_LANES, Tuning
+from .store import COIN, SPIKE
+
+futures = lazy_import('concurrent.futures')  # only for chunks built in the background
+
+ANY = -1  # a coin or a spike, by the tuning's coin_chance
+
+CHUNK_LENGTH = 600  # distance units, five screens at the base speed
+LOOKAHEAD_CHUNKS = 3
+BASE_SPEED = 5  # Car.base_speed; rows are one spawn interval of driving apart at it
+MIN_GAP_FACTOR = 0.3  # rows never get closer than this share of the starting gap
+GAP_SHRINK = 0.7 / 50000  # the gap is at its minimum 50,000 units down the road
+FULL_DIFFICULTY = 50000
+
+# name: (weight at the start, weight at full difficulty, rows of (lane, kind))
+FORMATIONS = {
+    'single': (6, 2, (((0, ANY),),)),
+    'coin_trail': (3, 2, (((0, COIN),), ((0, COIN),), ((0, COIN),))),
+    'zigzag': (2, 2, (((0, COIN),), ((1, COIN),), ((0, COIN),), ((1, COIN),))),
+    'bait': (1, 3, (((0, COIN),), ((0, SPIKE),))),
+    'spike_pair': (0, 3, (((0, SPIKE), (1, SPIKE)),)),
+    'gap_wall': (0, 2, (((0, SPIKE), (1, SPIKE), (3, SPIKE)),)),
+}
+
+
+def row_gap(tuning, distance):
+    """Distance between rows this far down the road"""
+    base_gap = tuning.base_spawn_interval * BASE_SPEED * 10
+    return base_gap * max(MIN_GAP_FACTOR, 1 - distance * GAP_SHRINK)
+
+
+def difficulty(distance):
+    """0 at the start of the road, rising to 1 at FULL_DIFFICULTY"""
+    return min(distance / FULL_DIFFICULTY, 1.0)
+
+
+class Chunk:
+    """One stretch of highway: rows of (lane, kind) at rising distances"""
+    def __init__(self, index, start, distances, rows):
+        self.index = index
+        self.start = start
+        self.end = start + CHUNK_LENGTH
+        self.distances = distances
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __repr__(self):
+        return f"Chunk({self.index}, {len(self.rows)} rows, {sum(map(len, self.rows))} objects)"
+
+
+def _place(cells, shift, mirror):
+    placed = []
+    for lane, kind in cells:
+        lane += shift
+        placed.append((N_LANES - 1 - lane if mirror else lane, kind))
+    return tuple(placed)
+
+
+def generate_chunk(seed, index, tuning=None):
+    """The chunk ``index`` of the highway for ``seed``, made from scratch"""
+    tuning = tuning if tuning is not None else Tuning()
+    rng = random.Random(f'highway:{seed}:{index}')
+    names = list(FORMATIONS)
+    start = index * CHUNK_LENGTH
+    end = start + CHUNK_LENGTH
+    distances, rows = [], []
+    cursor = start
+    while True:
+        level = difficulty(cursor)
+        weights = [early + (late - early) * level for early, late, _ in FORMATIONS.values()]
+        shape = FORMATIONS[rng.choices(names, weights)[0]][2]
+        width = 1 + max(lane for cells in shape for lane, _ in cells)
+        shift = rng.randrange(N_LANES - width + 1)
+        mirror = rng.random() < 0.5
+        gap = row_gap(tuning, cursor)
+        if cursor + len(shape) * gap > end:
+            if rows:
+                break  # rows never cross into the next chunk, so chunks stay independent
+            shape = shape[:max(1, int((end - cursor) // gap))]  # a road too sparse for the whole formation
+        for cells in shape:
+            row = []
+            for lane, kind in _place(cells, shift, mirror):
+                if kind == ANY:
+                    kind = COIN if rng.random() < tuning.coin_chance else SPIKE
+                row.append((lane, kind))
+            distances.append(cursor)
+            rows.append(tuple(row))
+            cursor += gap
+    return Chunk(index, start, distances, rows)
+
+
+def validate_chunk(chunk, tuning=None):
+    """The rules ``chunk`` breaks, as a list of messages; empty if none"""
+    tuning = tuning if tuning is not None else Tuning()
+    problems = []
+    previous = None
+    for distance, row in zip(chunk.distances, chunk.rows):
+        lanes = [lane for lane, _ in row]
+        if not chunk.start <= distance < chunk.end:
+            problems.append(f"row at {distance:.1f} is outside the chunk")
+        if previous is not None and distance - previous < row_gap(tuning, previous) - 1e-9:
+            problems.append(f"row at {distance:.1f} is too close to the one before")
+        if len(set(lanes)) != len(lanes) or not all(0 <= lane < N_LANES for lane in lanes):
+            problems.append(f"row at {distance:.1f} has bad lanes {lanes}")
+        if sum(kind == SPIKE for _, kind in row) >= N_LANES:
+            problems.append(f"row at {distance:.1f} blocks every lane")
+        if len(row) > tuning.max_objects_on_screen:
+            problems.append(f"row at {distance:.1f} has more objects than fit on the screen")
+        previous = distance
+    return problems
+
+
+class ChunkCache:
+    """The most recently used chunks of every seed, safe to share between threads"""
+    def __init__(self, max_chunks=256):
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, seed, index, tuning):
+        key = (seed, index, tuning.base_spawn_interval, tuning.coin_chance)
+        with self.lock:
+            chunk = self.chunks.get(key)
+            if chunk is not None:
+                self.chunks.move_to_end(key)
+                self.hits += 1
+                return chunk
+            self.misses += 1
+        chunk = generate_chunk(seed, index, tuning)  # two threads may both make it; either copy will do
+        with self.lock:
+            self.chunks[key] = chunk
+            while len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+        return chunk
+
+    def clear(self):
+        with self.lock:
+            self.chunks.clear()
+
+
+CHUNK_CACHE = ChunkCache()
+
+_worker = None
+
+
+def _background_worker():
+    """The one thread every stream builds its chunks on, started when first needed"""
+    global _worker
+    if _worker is None:
+        _worker = futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='highway')
+    return _worker
+
+
+class HighwayStream:
+    """Feeds a game the rows of its highway as the car reaches them.
+
+    With ``threaded`` set, the chunks ahead are built on a background
+    thread. A chunk that isn't ready when the car gets there is built on
+    the spot, so the game plays the same either way.
+    """
+    def __init__(self, seed, tuning=None, threaded=False, lookahead=LOOKAHEAD_CHUNKS, cache=CHUNK_CACHE):
+        self.threaded = threaded
+        self.lookahead = lookahead
+        self.cache = cache
+        self.restart(seed, tuning)
+
+    def restart(self, seed, tuning=None):
+        self.seed = seed
+        self.tuning = tuning if tuning is not None else Tuning()
+        self.seek(0, 0)
+
+    def seek(self, chunk_index, row_index):
+        """Carry on from row ``row_index`` of chunk ``chunk_index``"""
+        self.chunk = self.cache.get(self.seed, chunk_index, self.tuning)
+        self.row_index = row_index
+        self._prefetch()
+        self._find_next_row()
+
+    def _prefetch(self):
+        if not self.threaded:
+            return
+        worker = _background_worker()
+        for index in range(self.chunk.index + 1, self.chunk.index + 1 + self.lookahead):
+            worker.submit(self.cache.get, self.seed, index, self.tuning)
+
+    def _find_next_row(self):
+        while self.row_index >= len(self.chunk.rows):
+            self.chunk = self.cache.get(self.seed, self.chunk.index + 1, self.tuning)
+            self.row_index = 0
+            self._prefetch()
+        self.next_distance = self.chunk.distances[self.row_index]
+
+    @property
+    def position(self):
+        """(chunk index, row index) of the next row, for :meth:`seek`"""
+        return self.chunk.index, self.row_index
+
+    def due_rows(self, distance):
+        """The rows the car has reached at ``distance`` since the last call"""
+        rows = []
+        while distance >= self.next_distance:
+            rows.append(self.chunk.rows[self.row_index])
+            self.row_index += 1
+            self._find_next_row()
+        return rows
+
+
+def main(argv=None):
+    from .sweep import parse_setting
+
+    parser = argparse.ArgumentParser(description="Generate, check and time a stretch of highway.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunks', type=int, default=100, help="chunks from the start of the road")
+    parser.add_argument('--set', dest='settings', action='append', type=parse_setting, default=[],
+                        metavar='NAME=VALUE', help=f"tuning to generate with, one of: {', '.join(Tuning.FIELDS)}")
+    args = parser.parse_args(argv)
+    tuning = Tuning(**{name: values[0] for name, values in args.settings})
+
+    started = time.perf_counter()
+    chunks = [generate_chunk(args.seed, index, tuning) for index in range(args.chunks)]
+    elapsed = time.perf_counter() - started
+
+    problems = 0
+    for chunk in chunks:
+        for problem in validate_chunk(chunk, tuning):
+            print(f"chunk {chunk.index}: {problem}")
+            problems += 1
+    cells = [kind for chunk in chunks for row in chunk.rows for _, kind in row]
+    print(f"{args.chunks} chunks, {CHUNK_LENGTH * args.chunks:,} units of road: "
+          f"{sum(len(chunk) for chunk in chunks)} rows, {cells.count(COIN)} coins, {cells.count(SPIKE)} spikes")
+    print(f"generated in {elapsed * 1000:.1f} ms ({elapsed / max(args.chunks, 1) * 1e6:.0f} us a chunk), "
+          f"{problems} problems")
+    if problems:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
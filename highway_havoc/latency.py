@@ -0,0 +1,103 @@
+"""Input latency: when key presses arrive and when the car shows them.
+
+pygame events carry no timestamps, so :class:`InputQueue` polls while the
+frame scheduler waits and stamps each event with the time it was seen.
+:class:`LatencyTracker` follows a lane change from that stamp to the tick
+that applied it and then to the first frame presented after that tick,
+which is the first frame where the car has visibly started to slide.
+"""
+import time
+from collections import deque
+
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+pygame = lazy_import('pygame')
+
+PERCENTILES = (50, 90, 99)
+
+
+class InputQueue:
+    """Pygame events, each stamped with the time it was polled.
+
+    With ``wake_on_input`` set, :meth:`poll` returns True when a key went
+    down, which tells the FrameScheduler to start the next frame at once.
+    """
+    def __init__(self, wake_on_input=False, timer=time.perf_counter):
+        self.wake_on_input = wake_on_input
+        self.timer = timer
+        self.events = []
+
+    def poll(self):
+        now = self.timer()
+        key_down = False
+        for event in pygame.event.get():
+            self.events.append((now, event))
+            key_down = key_down or event.type == pygame.KEYDOWN
+        return self.wake_on_input and key_down
+
+    def drain(self):
+        """Poll once more and return every event seen since the last drain"""
+        self.poll()
+        events = self.events
+        self.events = []
+        return events
+
+
+class LatencyTracker:
+    def __init__(self, capacity=1000, timer=time.perf_counter):
+        self.timer = timer
+        self.waiting = []  # press times not yet applied by a tick
+        self.applied = []  # (press time, tick time) not yet on screen
+        self.samples = deque(maxlen=capacity)  # (press to tick, press to present) in seconds
+
+    def clear(self):
+        self.waiting.clear()
+        self.applied.clear()
+        self.samples.clear()
+
+    def discard_waiting(self):
+        """Forget lane changes that were dropped before a tick applied them"""
+        self.waiting.clear()
+
+    def pressed(self, timestamp):
+        """A lane change, seen at ``timestamp``, was queued for the simulation"""
+        self.waiting.append(timestamp)
+
+    def ticked(self):
+        """Every queued lane change has now been applied by a tick"""
+        if self.waiting:
+            now = self.timer()
+            self.applied.extend((pressed, now) for pressed in self.waiting)
+            self.waiting.clear()
+
+    def presented(self):
+        """A frame was just put on screen"""
+        if self.applied:
+            now = self.timer()
+            self.samples.extend((ticked - pressed, now - pressed) for pressed, ticked in self.applied)
+            self.applied.clear()
+
+    def summary(self):
+        """{'to_tick': {...}, 'to_present': {...}} in milliseconds"""
+        if not self.samples:
+            return {}
+        samples = np.array(self.samples) * 1000
+        summary = {}
+        for i, name in enumerate(('to_tick', 'to_present')):
+            column = samples[:, i]
+            stats = summary[name] = {'count': len(column), 'mean': float(column.mean()), 'max': float(column.max())}
+            for p, value in zip(PERCENTILES, np.percentile(column, PERCENTILES)):
+                stats[f'p{p}'] = float(value)
+        return summary
+
+    def report(self):
+        summary = self.summary()
+        if not summary:
+            return "no lane changes recorded"
+        lines = [f"input latency over {summary['to_present']['count']} lane changes (ms):"]
+        for name, label in (('to_tick', 'press to tick'), ('to_present', 'press to screen')):
+            stats = summary[name]
+            lines.append(f"  {label:<16}" + "  ".join(f"p{p} {stats[f'p{p}']:6.2f}" for p in PERCENTILES)
+                         + f"  max {stats['max']:6.2f}")
+        return '\n'.join(lines)
@@ -0,0 +1,30 @@
+"""Modules that are imported on first use instead of at import time.
+
+Importing pygame (which pulls in NumPy) takes a large share of a second,
+so the game logic names it with :func:`lazy_import` and only pays for it
+once something is actually drawn. Headless tools and bots that just step
+the simulation never load it at all.
+"""
+import importlib
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """``name`` as a module whose code runs on its first attribute access"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    parent, _, child = name.rpartition('.')
+    if parent:
+        # As the import system does, so ``import a.b`` elsewhere finds a.b
+        setattr(importlib.import_module(parent), child, module)
+    return module
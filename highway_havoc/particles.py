@@ -0,0 +1,107 @@
+"""Floating "+10" and "-25" popups as a fixed-size ring of particles.
+
+Positions, velocities and lifetimes live in NumPy arrays, so moving and
+expiring any number of popups is a few array operations with no
+per-popup Python work. A new popup takes the next slot of the ring, which
+once the ring is full is the oldest popup's. Each popup's text and colour
+are stored as a small style number, so the renderer can keep one set of
+faded surfaces per style instead of rendering text every frame.
+"""
+from .clock import SimulatedClock
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+
+CAPACITY = 512
+
+
+class FloatingTexts:
+    def __init__(self, capacity=CAPACITY, clock=None):
+        self.clock = clock if clock is not None else SimulatedClock()
+        self.capacity = capacity
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vel_y = np.zeros(capacity)
+        self.start_time = np.zeros(capacity)
+        self.duration = np.zeros(capacity)
+        self.style = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self._scratch = np.zeros(capacity)  # so updates allocate no arrays
+        self._young = np.zeros(capacity, dtype=bool)
+        self._live = np.zeros(capacity)  # 1.0 in live slots, 0.0 elsewhere
+        self.styles = []  # (text, color) of each style number
+        self._style_ids = {}
+        self.next = 0  # slot the next popup goes in
+        self.count = 0  # live popups
+
+    def __len__(self):
+        return self.count
+
+    def style_of(self, text, color):
+        key = (text, color)
+        style = self._style_ids.get(key)
+        if style is None:
+            style = self._style_ids[key] = len(self.styles)
+            self.styles.append(key)
+        return style
+
+    def add(self, text, x, y, color='white', duration=2.0, vel_y=-30):
+        """Start a popup now, replacing the oldest one if the ring is full"""
+        index = self.next
+        if not self.alive[index]:
+            self.count += 1
+        self.x[index] = x
+        self.y[index] = y
+        self.vel_y[index] = vel_y
+        self.start_time[index] = self.clock.now
+        self.duration[index] = duration
+        self.style[index] = self.style_of(text, color)
+        self.alive[index] = True
+        self.next = (index + 1) % self.capacity
+
+    def update(self, delta_time):
+        """Retire the popups that have run their time and float the rest up"""
+        if not self.count:
+            return
+        alive, scratch = self.alive, self._scratch
+        np.subtract(self.clock.now, self.start_time, out=scratch)
+        np.less(scratch, self.duration, out=self._young)
+        np.logical_and(alive, self._young, out=alive)
+        self.count = int(np.count_nonzero(alive))
+        # Masking with where= would allocate a buffer every call, so dead
+        # slots are moved by zero instead
+        live = self._live
+        np.copyto(live, alive)
+        np.multiply(self.vel_y, delta_time, out=scratch)
+        np.multiply(scratch, live, out=scratch)
+        np.add(self.y, scratch, out=self.y)
+        np.multiply(live, -0.02, out=scratch)
+        np.add(scratch, 1, out=scratch)  # 0.98 where live, 1 where not
+        np.multiply(self.vel_y, scratch, out=self.vel_y)
+
+    def live(self):
+        """Slots of the live popups, oldest first"""
+        slots = self.alive.nonzero()[0]
+        if not len(slots) or slots[0] >= self.next or slots[-1] < self.next:
+            return slots  # the live popups don't straddle the ring's start
+        wrap = int(slots.searchsorted(self.next))
+        return np.concatenate((slots[wrap:], slots[:wrap]))
+
+    def clear(self):
+        self.alive[:] = False
+        self.count = 0
+        self.next = 0
+
+    def items(self):
+        """(text, color, x, y, start_time, duration, vel_y) of each live popup, oldest first"""
+        return [(*self.styles[self.style[index]], float(self.x[index]), float(self.y[index]),
+                 float(self.start_time[index]), float(self.duration[index]), float(self.vel_y[index]))
+                for index in self.live().tolist()]
+
+    def restore(self, items):
+        """Replace every popup with ``items``, as returned by :meth:`items`"""
+        self.clear()
+        for text, color, x, y, start_time, duration, vel_y in items:
+            index = self.next
+            self.add(text, x, y, color, duration, vel_y)
+            self.start_time[index] = start_time
@@ -0,0 +1,164 @@
+"""Per-phase frame profiler.
+
+The game loop calls :meth:`FrameProfiler.begin_frame`, then
+:meth:`~FrameProfiler.mark` at the end of each phase, then
+:meth:`~FrameProfiler.end_frame`. Each mark charges the time since the
+previous one to its phase, so marks hit several times in one frame (the
+simulation can tick more than once) add up. Frames go into a fixed-size
+ring buffer that can be summarised on screen with :class:`ProfilerOverlay`
+or dumped to CSV or JSON.
+
+Nothing is timed while the profiler is disabled.
+"""
+import csv
+import json
+import time
+
+from .lazy import lazy_import
+from .text import TextLabel
+
+np = lazy_import('numpy')
+pygame = lazy_import('pygame')
+
+PHASES = ('events', 'spawn', 'speed', 'objects', 'road', 'entities', 'ui', 'floating_texts', 'flip')
+PERCENTILES = (50, 95, 99)
+
+
+class FrameProfiler:
+    def __init__(self, phases=PHASES, capacity=600, timer=time.perf_counter):
+        self.phases = phases
+        self.columns = {name: i for i, name in enumerate(phases)}
+        self.timer = timer
+        self.enabled = False
+        # One row per frame: the phases, then busy time and full frame time
+        self.samples = np.zeros((capacity, len(phases) + 2))
+        self.frames = 0  # frames recorded since the last clear
+        self._current = [0.0] * len(phases)
+        self._frame_start = None
+        self._last_mark = 0.0
+
+    @property
+    def capacity(self):
+        return len(self.samples)
+
+    def clear(self):
+        self.frames = 0
+        self._frame_start = None
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = self.timer()
+        if self._frame_start is not None:
+            self.samples[(self.frames - 1) % self.capacity, -1] = now - self._frame_start
+        self._frame_start = self._last_mark = now
+        for i in range(len(self._current)):
+            self._current[i] = 0.0
+
+    def mark(self, phase):
+        """Charge the time since the last mark to ``phase``"""
+        if not self.enabled or self._frame_start is None:
+            return
+        now = self.timer()
+        self._current[self.columns[phase]] += now - self._last_mark
+        self._last_mark = now
+
+    def skip(self):
+        """Leave the time since the last mark out of every phase"""
+        if self.enabled:
+            self._last_mark = self.timer()
+
+    def end_frame(self):
+        if not self.enabled or self._frame_start is None:
+            return
+        row = self.samples[self.frames % self.capacity]
+        row[:-2] = self._current
+        row[-2] = self._last_mark - self._frame_start
+        row[-1] = row[-2]  # until the next frame begins
+        self.frames += 1
+
+    def recorded(self):
+        """The recorded rows, oldest first, in seconds"""
+        if self.frames <= self.capacity:
+            return self.samples[:self.frames]
+        start = self.frames % self.capacity
+        return np.concatenate((self.samples[start:], self.samples[:start]))
+
+    def summary(self):
+        """{column: {'mean': ..., 'p50': ..., ...}} in milliseconds"""
+        rows = self.recorded() * 1000
+        summary = {}
+        if len(rows) == 0:
+            return summary
+        percentiles = np.percentile(rows, PERCENTILES, axis=0)
+        for i, name in enumerate(self.column_names):
+            summary[name] = {'mean': float(rows[:, i].mean())}
+            for p, values in zip(PERCENTILES, percentiles):
+                summary[name][f'p{p}'] = float(values[i])
+        return summary
+
+    @property
+    def column_names(self):
+        return self.phases + ('busy', 'frame')
+
+    def dump(self, path):
+        """Write the recorded frames to ``path``, as JSON if it ends in .json and CSV otherwise"""
+        rows = self.recorded() * 1000
+        if path.endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump({'unit': 'ms', 'columns': list(self.column_names),
+                           'summary': self.summary(), 'frames': rows.tolist()}, f, indent=2)
+        else:
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow([f'{name}_ms' for name in self.column_names])
+                writer.writerows(rows.tolist())
+
+
+class ProfilerOverlay:
+    """Percentile table and frame-time graph drawn over the game.
+
+    Given the loop's FrameScheduler it also shows the missed deadlines.
+    """
+    def __init__(self, profiler, scheduler=None, refresh_frames=30, graph_size=(300, 80), budget=1 / 60):
+        self.profiler = profiler
+        self.scheduler = scheduler
+        self.refresh_frames = refresh_frames
+        self.graph_size = graph_size
+        self.budget = budget
+        self.labels = [TextLabel(20, 'white') for _ in range(len(profiler.column_names) + 2)]
+        self.lines = []
+        self._refreshed_at = None
+
+    def _refresh(self):
+        summary = self.profiler.summary()
+        self.lines = ["phase            p50    p95    p99 ms"]
+        for name in self.profiler.column_names:
+            stats = summary.get(name)
+            if stats is not None:
+                self.lines.append(f"{name:<14}{stats['p50']:>6.2f} {stats['p95']:>6.2f} {stats['p99']:>6.2f}")
+        if self.scheduler is not None:
+            self.lines.append(f"missed deadlines: {self.scheduler.missed} of {self.scheduler.frames}")
+        self._refreshed_at = self.profiler.frames
+
+    def draw(self, screen, x=10, y=80):
+        if self._refreshed_at is None or self.profiler.frames - self._refreshed_at >= self.refresh_frames:
+            self._refresh()
+
+        width, height = self.graph_size
+        backdrop = pygame.Rect(x - 5, y - 5, width + 10, len(self.lines) * 18 + height + 15)
+        screen.fill((0, 0, 0), backdrop)
+        for i, (label, line) in enumerate(zip(self.labels, self.lines)):
+            screen.blit(label.render(line), (x, y + i * 18))
+
+        # Frame times, newest on the right; the green line is the frame budget
+        graph_top = y + len(self.lines) * 18 + 5
+        scale = height / (self.budget * 2)
+        budget_y = graph_top + height - self.budget * scale
+        pygame.draw.line(screen, (0, 160, 0), (x, budget_y), (x + width, budget_y))
+        frame_times = self.profiler.recorded()[-width:, -1]
+        for i, frame_time in enumerate(frame_times):
+            bar = min(frame_time * scale, height)
+            color = (255, 80, 80) if frame_time > self.budget * 1.05 else (200, 200, 200)
+            pygame.draw.line(screen, color, (x + i, graph_top + height), (x + i, graph_top + height - bar))
+        return backdrop
@@ -0,0 +1,126 @@
+"""Drawing a game in progress: road, objects, cars, HUD and floating texts."""
+from .lazy import lazy_import
+from .settings import SCREEN_WIDTH, SCREEN_HEIGHT
+from .store import COIN, SPIKE
+from .text import TextLabel, fade_cache
+
+np = lazy_import('numpy')
+
+
+class Hud:
+    """Speed, distance, money and pickup counters"""
+    def __init__(self):
+        self.speed_label = TextLabel(28, 'white')
+        self.distance_label = TextLabel(28, 'white')
+        self.money_label = TextLabel(36, 'yellow')
+        self.coins_label = TextLabel(24, 'yellow')
+        self.spikes_label = TextLabel(24, 'red')
+        self.player_labels = []  # (money, stats) labels of each player, made as needed
+
+    def draw(self, screen, car, game_state):
+        base_x, base_y = 10, 10
+
+        # Main game stats
+        speed_text = self.speed_label.render(f"Speed: {int(car.speed)}")
+        distance_text = self.distance_label.render(f"Distance: {int(car.distance)}")
+        screen.blit(speed_text, (base_x, base_y))
+        screen.blit(distance_text, (base_x, base_y + 30))
+
+        # Money display
+        money_text = self.money_label.render(f"Money: ${game_state.money:,}")
+        screen.blit(money_text, (SCREEN_WIDTH - 250, base_y))
+
+        # Bottom stats
+        stats_y = SCREEN_HEIGHT - 60
+        coins_text = self.coins_label.render(f"Coins: {game_state.coins_collected}")
+        spikes_text = self.spikes_label.render(f"Spikes Hit: {game_state.spikes_hit}")
+        screen.blit(coins_text, (base_x, stats_y))
+        screen.blit(spikes_text, (base_x + 100, stats_y))
+
+    def draw_players(self, screen, cars, game_states):
+        """Each player's money, speed and pickups, players 1 and 3 on the left"""
+        while len(self.player_labels) < len(cars):
+            car = cars[len(self.player_labels)]
+            self.player_labels.append((TextLabel(36, car.color), TextLabel(24, 'white')))
+        for player, (car, game_state) in enumerate(zip(cars, game_states)):
+            money_label, stats_label = self.player_labels[player]
+            money_text = money_label.render(f"P{player + 1}: ${game_state.money:,}")
+            stats_text = stats_label.render(f"Speed {int(car.speed)}  Coins {game_state.coins_collected}  "
+                                            f"Spikes {game_state.spikes_hit}" if car.speed > 0 else "Out")
+            x = 10 if player % 2 == 0 else SCREEN_WIDTH - 10 - max(money_text.get_width(), stats_text.get_width())
+            y = 10 + player // 2 * 70
+            screen.blit(money_text, (x, y))
+            screen.blit(stats_text, (x, y + 34))
+
+
+def draw_objects(screen, objects):
+    """Draw every coin, then every spike over them.
+
+    Each lane is walked from the bottom up, which is oldest first while
+    its objects fall together, so overlapping objects stack as they always
+    have without sorting the live slots every frame.
+    """
+    kinds = objects.kind
+    for kind in (COIN, SPIKE):
+        for bucket in objects.lanes:
+            for index in reversed(bucket):
+                if kinds[index] == kind:
+                    objects.view(index).draw(screen)
+
+
+def draw_floating_texts(screen, game_state):
+    """Draw every popup, oldest first, faded by how much of its time has passed"""
+    texts = game_state.floating_texts
+    if not texts:
+        return
+    slots = texts.live()
+    steps = fade_cache.steps
+    # Worked in place, so only a few small arrays are alive at once
+    progress = texts.start_time[slots]
+    np.subtract(game_state.clock.now, progress, out=progress)
+    np.divide(progress, texts.duration[slots], out=progress)
+    np.multiply(progress, steps, out=progress)
+    np.maximum(progress, 0.0, out=progress)  # cheaper than np.clip, which allocates more
+    np.minimum(progress, steps - 1.0, out=progress)
+    fades = progress.astype(np.int64).tolist()
+    # Look up each (style, fade step) once, however many popups share it;
+    # a dict rather than np.unique, whose sort allocates a buffer every frame
+    surfaces = {}
+    blits = []
+    for style, fade, x, y in zip(texts.style[slots].tolist(), fades, texts.x[slots].tolist(),
+                                 texts.y[slots].tolist()):
+        look = style * steps + fade
+        found = surfaces.get(look)
+        if found is None:
+            text, color = texts.styles[style]
+            surface = fade_cache.render(text, 32, color, fade)
+            found = surfaces[look] = (surface, surface.get_width() // 2)
+        blits.append((found[0], (x - found[1], y)))
+    screen.blits(blits, doreturn=False)
+
+
+def draw_playing(screen, sim, road, hud, profiler=None):
+    """Draw one frame of a game in progress.
+
+    ``profiler`` is an optional FrameProfiler to mark the drawing phases on.
+    """
+    road.draw(screen, sim.road_scroll_offset)
+    if profiler is not None:
+        profiler.mark('road')
+
+    draw_objects(screen, sim.objects)
+    for car in sim.cars:
+        car.draw(screen)
+    if profiler is not None:
+        profiler.mark('entities')
+
+    if sim.players == 1:
+        hud.draw(screen, sim.car, sim.game_state)
+    else:
+        hud.draw_players(screen, sim.cars, sim.game_states)
+    if profiler is not None:
+        profiler.mark('ui')
+    for game_state in sim.game_states:
+        draw_floating_texts(screen, game_state)
+    if profiler is not None:
+        profiler.mark('floating_texts')
@@ -0,0 +1,452 @@
+"""Compact binary replays of single games.
+
+A game is decided by its seed, its tuning, whether it is on a planned
+highway and the ticks its lane changes were applied on, so that is all a
+replay has to store. Playing one back
+re-simulates the game through the usual :class:`FixedStepRunner`, ``Car``,
+``Coin`` and ``Spikes`` code, either in the window at real speed or
+headless as fast as the CPU allows. With different tuning the same inputs
+re-score the run under new balance constants.
+
+File layout::
+
+    MAGIC, header length (varint), JSON header
+    records, each a varint tag (ticks since the previous record << 2 | code)
+        LEFT, RIGHT   a lane change applied on that tick
+        KEYFRAME      length (varint), then the whole game state before the tick
+        END           money, coins, spikes (varints) and distance (double)
+
+A lane change every half second costs a byte or two. Keyframes, every
+``KEYFRAME_INTERVAL`` ticks, make seeking cost at most that many ticks of
+simulation and are most of a replay's size: about 3 KB per minute.
+
+Example::
+
+    python -m highway_havoc.replay game.hhr                 # play it headless and check the result
+    python -m highway_havoc.replay game.hhr --seek 45       # the state 45 seconds in
+    python -m highway_havoc.replay game.hhr --set coin_chance=0.5   # re-score it
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+from bisect import bisect_right
+
+from .effects import BOOST, SLOWDOWN
+from .settings import Tuning
+from .simulation import SimulationState, FixedStepRunner
+
+MAGIC = b'HHREPLAY'
+VERSION = 3  # 2: spawns are queued, see highway_havoc.spawner; 3: and may come from a highway
+KEYFRAME_INTERVAL = 900  # ticks, 15 seconds at 60 ticks a second
+LEFT, RIGHT, KEYFRAME, END = range(4)
+SHAPES = (BOOST, SLOWDOWN)
+
+_DOUBLE = struct.Struct('<d')
+
+
+def default_replay_dir():
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(data_home, 'highway-havoc', 'replays')
+
+
+class ReplayFormatError(ValueError):
+    pass
+
+
+class _Writer:
+    def __init__(self):
+        self.data = bytearray()
+
+    def varint(self, value):
+        if value < 0:
+            raise ValueError(f"varints are unsigned, got {value}")
+        while value >= 0x80:
+            self.data.append(value & 0x7f | 0x80)
+            value >>= 7
+        self.data.append(value)
+
+    def double(self, value):
+        self.data += _DOUBLE.pack(value)
+
+    def string(self, value):
+        raw = value.encode()
+        self.varint(len(raw))
+        self.data += raw
+
+
+class _Reader:
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+
+    @property
+    def at_end(self):
+        return self.pos >= len(self.data)
+
+    def varint(self):
+        value = shift = 0
+        while True:
+            if self.pos >= len(self.data):
+                raise ReplayFormatError("replay ends in the middle of a number")
+            byte = self.data[self.pos]
+            self.pos += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def bytes(self, length):
+        if self.pos + length > len(self.data):
+            raise ReplayFormatError("replay is cut short")
+        raw = self.data[self.pos:self.pos + length]
+        self.pos += length
+        return raw
+
+    def double(self):
+        return _DOUBLE.unpack(self.bytes(8))[0]
+
+    def string(self):
+        return self.bytes(self.varint()).decode()
+
+
+_CAR_FLOATS = ('x', 'target_x', 'speed', 'base_speed', 'distance', 'position_offset', 'flash_end_time',
+               'last_coin_time', 'last_spike_time', 'last_spike_decrease')
+
+
+def capture_state(state):
+    """Everything a keyframe needs to put a game back exactly as it is"""
+    out = _Writer()
+    out.double(state.clock.now)
+    out.double(state.last_spawn_time)
+    out.double(state.road_scroll_offset)
+    out.varint(state.rng.words)
+
+    car = state.car
+    for name in _CAR_FLOATS:
+        out.double(getattr(car, name))
+    out.varint(car.lane)
+    out.string(car.flash_color or '')
+    out.varint(len(car.effects.effects))
+    for shape, start, amount in car.effects.effects:
+        out.varint(SHAPES.index(shape))
+        out.double(start)
+        out.double(amount)
+
+    game_state = state.game_state
+    for value in (game_state.money, game_state.high_score, game_state.coins_collected,
+                  game_state.spikes_hit, game_state.current_state):
+        out.varint(value)
+    out.double(game_state.total_distance)
+    texts = game_state.floating_texts.items()
+    out.varint(len(texts))
+    for text, color, *values in texts:
+        out.string(text)
+        out.string(color)
+        for value in values:
+            out.double(value)
+
+    spawner = state.spawner
+    out.varint(len(spawner.queue))
+    for kind, lane in spawner.queue:
+        out.varint(kind)
+        out.varint(0 if lane is None else lane + 1)
+    for value in spawner.stats.as_dict().values():
+        out.varint(value)
+    if state.highway is not None:
+        for value in state.highway.position:
+            out.varint(value)
+
+    slots = state.objects.slots()
+    out.varint(state.objects.spawned)
+    out.varint(len(slots))
+    for index, kind, x, y, width, height, fall_speed, order in slots:
+        out.varint(index)
+        out.varint(kind)
+        for value in (x, y, width, height, fall_speed):
+            out.double(value)
+        out.varint(order)
+    return bytes(out.data)
+
+
+def restore_state(state, payload):
+    """Put ``state`` back as :func:`capture_state` found it"""
+    data = _Reader(payload)
+    state.clock.reset(data.double())
+    state.last_spawn_time = data.double()
+    state.road_scroll_offset = data.double()
+    state.rng.seed(state.seed)
+    state.rng.skip(data.varint())
+
+    car = state.car
+    for name in _CAR_FLOATS:
+        setattr(car, name, data.double())
+    car.lane = data.varint()
+    car.flash_color = data.string() or None
+    car.effects.clear()
+    for _ in range(data.varint()):
+        shape = SHAPES[data.varint()]
+        car.effects.add(shape, data.double(), data.double())
+
+    game_state = state.game_state
+    (game_state.money, game_state.high_score, game_state.coins_collected,
+     game_state.spikes_hit, game_state.current_state) = (data.varint() for _ in range(5))
+    game_state.total_distance = data.double()
+    texts = []
+    for _ in range(data.varint()):
+        texts.append((data.string(), data.string(), *(data.double() for _ in range(5))))
+    game_state.floating_texts.restore(texts)
+
+    spawner = state.spawner
+    spawner.queue.clear()
+    for _ in range(data.varint()):
+        kind, lane = data.varint(), data.varint()
+        spawner.queue.append((kind, lane - 1 if lane else None))
+    for name in spawner.stats.FIELDS:
+        setattr(spawner.stats, name, data.varint())
+    if state.highway is not None:
+        state.highway.seek(data.varint(), data.varint())
+
+    spawned = data.varint()
+    slots = []
+    for _ in range(data.varint()):
+        index, kind = data.varint(), data.varint()
+        x, y, width, height, fall_speed = (data.double() for _ in range(5))
+        slots.append((index, kind, x, y, width, height, fall_speed, data.varint()))
+    state.objects.restore(slots, spawned)
+    state.events.clear()
+
+
+def outcome(state):
+    game_state = state.game_state
+    return {'money': game_state.money, 'coins': game_state.coins_collected,
+            'spikes': game_state.spikes_hit, 'distance': state.car.distance}
+
+
+class ReplayRecorder:
+    """Records the game a FixedStepRunner has just started.
+
+    :meth:`start` hooks the recorder into the runner, which then shows it
+    every tick's inputs; :meth:`finish` unhooks it and returns the bytes.
+    """
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.out = None
+        self.last_tick = 0
+        self.runner = None
+
+    def start(self, runner):
+        state = runner.state
+        if not hasattr(state.rng, 'words'):
+            raise ValueError("replays need the simulation's own CountingRandom")
+        if state.players != 1:
+            raise ValueError("replays hold single-player games")
+        header = json.dumps({
+            'version': VERSION, 'seed': state.seed, 'rng_words': state.rng.words,
+            'tuning': state.tuning.as_dict(), 'highway': state.highway is not None, 'timestep': runner.timestep,
+            'keyframe_interval': self.keyframe_interval, 'recorded_at': time.time(),
+        }, separators=(',', ':')).encode()
+        self.out = _Writer()
+        self.out.data += MAGIC
+        self.out.varint(len(header))
+        self.out.data += header
+        self.last_tick = runner.tick_count
+        self.runner = runner
+        runner.replay = self
+
+    def _record(self, tick, code):
+        self.out.varint((tick - self.last_tick) << 2 | code)
+        self.last_tick = tick
+
+    def before_tick(self, runner):
+        tick = runner.tick_count
+        if tick and tick % self.keyframe_interval == 0:
+            payload = capture_state(runner.state)
+            self._record(tick, KEYFRAME)
+            self.out.varint(len(payload))
+            self.out.data += payload
+        for _, direction in runner.pending_inputs:
+            self._record(tick, RIGHT if direction > 0 else LEFT)
+
+    @property
+    def recording(self):
+        return self.runner is not None
+
+    def finish(self):
+        """Stop recording and return the replay"""
+        runner, self.runner = self.runner, None
+        runner.replay = None
+        result = outcome(runner.state)
+        self._record(runner.tick_count, END)
+        for name in ('money', 'coins', 'spikes'):
+            self.out.varint(result[name])
+        self.out.double(result['distance'])
+        return bytes(self.out.data)
+
+    def save(self, path):
+        """Finish and write the replay to ``path``"""
+        data = self.finish()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return data
+
+
+class Replay:
+    """A parsed replay: header, lane changes by tick, keyframes and the result.
+
+    ``outcome`` is None for a replay whose recording was cut off.
+    """
+    def __init__(self, header, inputs, keyframes, ticks, outcome, size):
+        self.header = header
+        self.seed = header['seed']
+        self.rng_words = header['rng_words']
+        self.tuning = Tuning(**header['tuning'])
+        self.highway = header['highway']
+        self.timestep = header['timestep']
+        self.inputs = inputs  # tick: [direction, ...]
+        self.keyframes = keyframes  # [(tick, payload)], in tick order
+        self.ticks = ticks
+        self.outcome = outcome
+        self.size = size
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ReplayFormatError("not a Highway Havoc replay")
+        reader = _Reader(data, len(MAGIC))
+        try:
+            header = json.loads(reader.bytes(reader.varint()).decode())
+        except ValueError:
+            raise ReplayFormatError("unreadable replay header")
+        if header.get('version') != VERSION:
+            raise ReplayFormatError(f"unsupported replay version {header.get('version')}")
+
+        inputs, keyframes, tick, result = {}, [], 0, None
+        while not reader.at_end:
+            tag = reader.varint()
+            tick += tag >> 2
+            code = tag & 3
+            if code == KEYFRAME:
+                keyframes.append((tick, reader.bytes(reader.varint())))
+            elif code == END:
+                result = {name: reader.varint() for name in ('money', 'coins', 'spikes')}
+                result['distance'] = reader.double()
+                break
+            else:
+                inputs.setdefault(tick, []).append(1 if code == RIGHT else -1)
+        return cls(header, inputs, keyframes, tick, result, len(data))
+
+    @property
+    def duration(self):
+        return self.ticks * self.timestep
+
+    def keyframe_before(self, tick):
+        """The last (tick, payload) keyframe at or before ``tick``, or None"""
+        i = bisect_right(self.keyframes, tick, key=lambda keyframe: keyframe[0])
+        return self.keyframes[i - 1] if i else None
+
+
+class ReplayPlayer:
+    """Plays a replay back through a FixedStepRunner of its own.
+
+    Each tick the player queues the lane changes recorded for it, so
+    :meth:`FixedStepRunner.advance` plays the game at real speed and
+    :meth:`seek` or :meth:`run` as fast as it can. Given ``tuning`` other
+    than the recorded one, the inputs are re-simulated under it and the
+    keyframes, which hold the original game, are not used.
+    """
+    def __init__(self, replay, tuning=None):
+        self.replay = replay
+        self.tuning = tuning if tuning is not None else replay.tuning
+        self.rescoring = self.tuning != replay.tuning
+        self.state = SimulationState(seed=replay.seed, tuning=self.tuning, highway=replay.highway)
+        self.runner = FixedStepRunner(self.state, timestep=replay.timestep)
+        self.runner.replay = self
+        self.restart()
+
+    def restart(self):
+        self.runner.reset(self.replay.seed)
+        self.state.rng.skip(self.replay.rng_words)
+
+    def before_tick(self, runner):
+        runner.pending_inputs.extend((0, direction) for direction in self.replay.inputs.get(runner.tick_count, ()))
+
+    @property
+    def finished(self):
+        return self.runner.tick_count >= self.replay.ticks or not self.state.playing
+
+    def seek(self, tick):
+        """Put the game in its state after ``tick`` ticks, or at its end if sooner"""
+        tick = min(tick, self.replay.ticks)
+        runner = self.runner
+        keyframe = None if self.rescoring else self.replay.keyframe_before(tick)
+        if keyframe is not None and not keyframe[0] <= runner.tick_count <= tick:
+            restore_state(self.state, keyframe[1])
+            runner.tick_count = keyframe[0]
+            runner.accumulator = 0.0
+            runner.pending_inputs.clear()
+        elif runner.tick_count > tick:
+            self.restart()
+        while runner.tick_count < tick and self.state.playing:
+            runner.tick()
+        return self.state
+
+    def run(self):
+        """Play to the end as fast as possible and return the final state"""
+        return self.seek(self.replay.ticks)
+
+
+def describe(replay):
+    return (f"{replay.duration:.1f} s, seed {replay.seed}{' on a highway' if replay.highway else ''}, {sum(map(len, replay.inputs.values()))} lane changes, "
+            f"{len(replay.keyframes)} keyframes, {replay.size} bytes "
+            f"({replay.size / max(replay.duration, 1) * 60 / 1024:.1f} KB/min)")
+
+
+def main(argv=None):
+    from .sweep import parse_setting
+
+    parser = argparse.ArgumentParser(description="Play a replay headless and report how the game went.")
+    parser.add_argument('path')
+    parser.add_argument('--seek', type=float, metavar='SECONDS', help="stop this far into the game")
+    parser.add_argument('--set', dest='settings', action='append', type=parse_setting, default=[],
+                        metavar='NAME=VALUE', help=f"re-score with other tuning, one of: {', '.join(Tuning.FIELDS)}")
+    args = parser.parse_args(argv)
+
+    if any(len(values) > 1 for _, values in args.settings):
+        parser.error("--set takes a single value per constant here")
+
+    replay = Replay.load(args.path)
+    print(describe(replay))
+    tuning = replay.tuning.replace(**{name: values[0] for name, values in args.settings})
+    player = ReplayPlayer(replay, tuning)
+    started = time.perf_counter()
+    if args.seek is not None:
+        state = player.seek(round(args.seek / replay.timestep))
+    else:
+        state = player.run()
+    elapsed = time.perf_counter() - started
+
+    result = outcome(state)
+    print(f"played {player.runner.tick_count * replay.timestep:.1f} s in {elapsed * 1000:.1f} ms: "
+          f"money {result['money']}, coins {result['coins']}, spikes {result['spikes']}, "
+          f"distance {result['distance']:.1f}")
+    stats = state.spawner.stats
+    print(f"spawns: {stats.requested} requested, {stats.placed} placed, "
+          f"{stats.deferred} deferred, {stats.dropped} dropped")
+    if args.seek is None and not player.rescoring and replay.outcome is not None:
+        if result != replay.outcome:
+            print(f"DIFFERS from the recorded game: {replay.outcome}")
+            sys.exit(1)
+        print("matches the recorded game")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Pre-rendered, scrolling road background."""
+from .lazy import lazy_import
+from .settings import SCREEN_WIDTH, SCREEN_HEIGHT, ROAD_X, ROAD_WIDTH, LANE_WIDTH
+
+pygame = lazy_import('pygame')
+
+MARKING_SPACING = 100
+
+
+class RoadLayer:
+    """The road drawn once into a surface one marking taller than the screen.
+
+    The centre markings repeat every ``MARKING_SPACING`` pixels, so any
+    scroll position is a single blit of the same surface shifted up by
+    less than one spacing.
+    """
+    def __init__(self, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.width = width
+        self.height = height
+        self.surface = None
+
+    def render(self):
+        surface = pygame.Surface((self.width, self.height + MARKING_SPACING))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        surface.fill('black')
+        pygame.draw.rect(surface, 'grey50', (ROAD_X, 0, ROAD_WIDTH, surface.get_height()))
+        for i in range(1, 4):
+            pygame.draw.line(surface, 'white', (ROAD_X + i * LANE_WIDTH, 0),
+                             (ROAD_X + i * LANE_WIDTH, surface.get_height()), 2)
+        for y in range(0, surface.get_height(), MARKING_SPACING):
+            pygame.draw.rect(surface, 'white', (ROAD_X + ROAD_WIDTH // 2 - 5, y, 10, 40))
+        self.surface = surface
+
+    def draw(self, screen, scroll_offset):
+        if self.surface is None:
+            self.render()
+        marking_offset = int(scroll_offset) % MARKING_SPACING
+        screen.blit(self.surface, (0, marking_offset - MARKING_SPACING))
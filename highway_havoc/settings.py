@@ -0,0 +1,62 @@
+# Screen dimensions
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+
+# Game states
+MENU_STATE = 0
+PLAYING_STATE = 1
+GAME_OVER_STATE = 2
+
+# Road settings
+ROAD_WIDTH = 400
+N_LANES = 4
+LANE_WIDTH = ROAD_WIDTH // N_LANES
+ROAD_X = (SCREEN_WIDTH - ROAD_WIDTH) // 2
+
+# Spawning
+BASE_SPAWN_INTERVAL = 1.5
+MAX_OBJECTS_ON_SCREEN = 8
+COIN_CHANCE = 0.6  # the rest are spikes
+
+# Pickups
+COIN_BOOST = 20
+COIN_COMBO_BOOST = 5  # coin within a second of the last one
+SPIKE_DECREASE = 30
+SPIKE_COMBO_FACTOR = 0.5  # spike within a second of the last one
+
+FPS = 60
+
+# Simulation
+FIXED_TIMESTEP = 1.0 / FPS
+MAX_FRAME_TIME = 0.25  # longest frame the simulation will catch up on
+
+
+class Tuning:
+    """Balance constants for one game, defaulting to the values above"""
+    FIELDS = ('base_spawn_interval', 'max_objects_on_screen', 'coin_chance',
+              'coin_boost', 'coin_combo_boost', 'spike_decrease', 'spike_combo_factor')
+
+    def __init__(self, **overrides):
+        self.base_spawn_interval = BASE_SPAWN_INTERVAL
+        self.max_objects_on_screen = MAX_OBJECTS_ON_SCREEN
+        self.coin_chance = COIN_CHANCE
+        self.coin_boost = COIN_BOOST
+        self.coin_combo_boost = COIN_COMBO_BOOST
+        self.spike_decrease = SPIKE_DECREASE
+        self.spike_combo_factor = SPIKE_COMBO_FACTOR
+        for name, value in overrides.items():
+            if name not in self.FIELDS:
+                raise TypeError(f"Unknown tuning constant: {name}")
+            setattr(self, name, value)
+
+    def replace(self, **overrides):
+        return Tuning(**{**self.as_dict(), **overrides})
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self):
+        return f"Tuning({', '.join(f'{k}={v!r}' for k, v in self.as_dict().items())})"
+
+    def __eq__(self, other):
+        return isinstance(other, Tuning) and self.as_dict() == other.as_dict()
@@ -0,0 +1,286 @@
+"""Headless game simulation.
+
+Everything that decides how a game plays out lives here: spawning, car
+speed, falling objects and collisions. Nothing in this module opens a
+window, plays a sound or reads the wall clock: game time comes from a
+:class:`~highway_havoc.clock.SimulatedClock` that only moves when the game
+is stepped, so games can be run as fast as the CPU allows. The pygame front
+end in :mod:`highway_havoc.game` feeds key presses into :func:`step` and
+draws the resulting state.
+
+Games are reproducible: the :class:`~highway_havoc.spawner.SpawnScheduler`
+draws from a seeded ``random.Random`` owned by the state, and
+:class:`FixedStepRunner` advances the game in fixed ``FIXED_TIMESTEP``
+steps however fast frames are being rendered.
+"""
+import math
+import random
+
+from .clock import SimulatedClock
+from .entities import Car, Coin, Spikes, SimplifiedGameState
+from .highway import HighwayStream
+from .spawner import SpawnScheduler
+from .store import COIN, SPIKE, FallingObjectStore
+from .settings import (
+    SCREEN_WIDTH, SCREEN_HEIGHT,
+    PLAYING_STATE, GAME_OVER_STATE,
+    FIXED_TIMESTEP, MAX_FRAME_TIME, Tuning,
+)
+
+
+class CountingRandom(random.Random):
+    """``random.Random`` that counts the 32-bit words it has drawn.
+
+    A generator seeded the same way and moved on by :meth:`skip` ends up in
+    the same state, so a replay keyframe stores one number instead of the
+    2.5 KB Mersenne Twister state.
+    """
+    def seed(self, a=None, version=2):
+        super().seed(a, version)
+        self.words = 0
+
+    def random(self):
+        self.words += 2
+        return super().random()
+
+    def getrandbits(self, k):
+        self.words += (k + 31) // 32
+        return super().getrandbits(k)
+
+    def skip(self, words):
+        """Draw and throw away ``words`` words"""
+        while words > 0:
+            chunk = min(words, 1 << 16)
+            self.getrandbits(32 * chunk)
+            words -= chunk
+
+
+PLAYER_COLORS = ('blue', 'orange', 'green', 'magenta')
+SOLO = (0,)  # the cars driving in a one-player game, so its steps make no list
+
+
+class SimulationState:
+    """One game. With ``highway`` set, spawns follow a planned
+    :class:`~highway_havoc.highway.HighwayStream` instead of the spawn
+    interval; ``highway='threaded'`` builds its chunks in the background.
+
+    ``players`` cars share the road and the falling objects, each scoring
+    into a game state of its own. ``car`` and ``game_state`` are the first
+    player's. A car whose speed reaches 0 is out and stops where it is;
+    the game is over for everyone when the last car is out.
+    """
+    def __init__(self, seed=None, rng=None, clock=None, tuning=None, highway=False, players=1):
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed = seed
+        self.seed_used = False  # whether a game has been started on the seed
+        self.rng = rng if rng is not None else CountingRandom(seed)
+        self.clock = clock if clock is not None else SimulatedClock()
+        self.tuning = tuning if tuning is not None else Tuning()
+        self.cars = [Car(SCREEN_WIDTH // 2 - 25, SCREEN_HEIGHT * 2 // 3, 50, 30, player + 1,
+                         PLAYER_COLORS[player % len(PLAYER_COLORS)], self.clock)
+                     for player in range(players)]
+        self.game_states = [SimplifiedGameState(self.clock, self.tuning) for _ in range(players)]
+        self.car = self.cars[0]
+        self.game_state = self.game_states[0]
+        self.pace_car = self.car  # the car spawning and the road follow
+        self.objects = FallingObjectStore(view_types={COIN: Coin, SPIKE: Spikes})
+        self.spawner = SpawnScheduler()
+        self.highway = HighwayStream(seed, self.tuning, threaded=highway == 'threaded') if highway else None
+        self.last_spawn_time = -math.inf
+        self.road_scroll_offset = 0
+        self.events = []
+        self.profiler = None  # a FrameProfiler to time the step's phases
+
+    def reset(self, seed=None):
+        """Start a new game on ``seed``, keeping the high score.
+
+        Without a seed the first game keeps the one the state was made
+        with, and every later game draws a fresh one, so a restart doesn't
+        replay the same road.
+        """
+        if seed is None and self.seed_used:
+            seed = random.randrange(2**32)
+        if seed is not None:
+            self.seed = seed
+            self.rng.seed(seed)
+        self.seed_used = True
+        self.clock.reset()
+        for car, game_state in zip(self.cars, self.game_states):
+            game_state.reset_game()
+            car.reset()
+            game_state.current_state = PLAYING_STATE
+        self.pace_car = self.car
+        self.objects.clear()
+        self.spawner.reset()
+        if self.highway is not None:
+            self.highway.restart(self.seed, self.tuning)
+        self.last_spawn_time = -math.inf
+        self.road_scroll_offset = 0
+        self.events.clear()
+
+    @property
+    def time(self):
+        return self.clock.now
+
+    @property
+    def coins(self):
+        return self.objects.live(COIN)
+
+    @property
+    def spikes(self):
+        return self.objects.live(SPIKE)
+
+    @property
+    def players(self):
+        return len(self.cars)
+
+    @property
+    def playing(self):
+        return self.game_state.current_state == PLAYING_STATE
+
+
+def spawn_objects(state):
+    """Request and place this tick's coins and spikes"""
+    state.spawner.update(state)
+
+
+def collect_object(state, index, car, game_state):
+    """Let ``car`` collect the object in slot ``index`` and record the event"""
+    objects = state.objects
+    obj = objects.view(index)
+    obj.collect(car, game_state)
+    state.events.append(('coin' if objects.kind[index] == COIN else 'spike', obj))
+
+
+def step(state, inputs, dt):
+    """Advance a playing game by ``dt`` seconds.
+
+    ``inputs`` is an iterable of ``(player, direction)`` lane changes
+    (direction -1 for left, 1 for right) made since the previous step.
+    Returns the list of ``(kind, obj)`` events that happened this step,
+    where kind is ``'coin'`` or ``'spike'``; the list is reused by the
+    next step.
+    """
+    state.events.clear()
+    if not state.playing:
+        return state.events
+
+    state.clock.tick(dt)
+    cars = state.cars
+    game_states = state.game_states
+    if len(cars) == 1:
+        driving = SOLO
+    else:
+        driving = [player for player, car in enumerate(cars) if car.speed > 0]
+
+    for player, direction in inputs:
+        if cars[player].speed > 0:
+            cars[player].move(direction)
+
+    # The car furthest down the road sets the pace of spawns and the road
+    pace_car = cars[driving[0]]
+    for player in driving:
+        if cars[player].distance > pace_car.distance:
+            pace_car = cars[player]
+    state.pace_car = pace_car
+    profiler = state.profiler
+    spawn_objects(state)
+    if profiler is not None:
+        profiler.mark('spawn')
+
+    for player in driving:
+        cars[player].update_speed_and_position(dt)
+        game_states[player].total_distance = cars[player].distance
+    if profiler is not None:
+        profiler.mark('speed')
+    for game_state in game_states:
+        game_state.update_floating_texts(dt)
+
+    # Check for game over condition; a loop, as a generator would be made every step
+    for car in cars:
+        if car.speed > 0:
+            break
+    else:
+        for game_state in game_states:
+            game_state.current_state = GAME_OVER_STATE
+
+    road_scroll_speed = 30 * (pace_car.speed / pace_car.base_speed) if pace_car.speed > 0 else 0
+    state.road_scroll_offset += road_scroll_speed * dt
+
+    # Fall and cull every object at once, then collide them with every
+    # car still driving in one pass and collect the hits
+    objects = state.objects
+    objects.fall(dt)
+    if len(driving) == 1:
+        car = cars[driving[0]]
+        for index in objects.overlapping(car.x, car.y + car.position_offset, car.width, car.height):
+            collect_object(state, index, car, game_states[driving[0]])
+    else:
+        boxes = [(cars[player].x, cars[player].y + cars[player].position_offset,
+                  cars[player].width, cars[player].height) for player in driving]
+        for index, box in objects.colliding(boxes):
+            collect_object(state, index, cars[driving[box]], game_states[driving[box]])
+
+    for player in driving:
+        cars[player].update_lane_position()
+    if profiler is not None:
+        profiler.mark('objects')
+    return state.events
+
+
+class FixedStepRunner:
+    """Drives :func:`step` with a fixed timestep from variable frame times.
+
+    Frame time is collected in an accumulator and spent in whole
+    ``timestep`` ticks, so the same seed and the same inputs on the same
+    ticks always produce the same game, whatever the render frame rate.
+    Lane changes are queued, with the player making them, and applied on
+    the next tick.
+    """
+    def __init__(self, state, timestep=FIXED_TIMESTEP, max_frame_time=MAX_FRAME_TIME):
+        self.state = state
+        self.timestep = timestep
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.tick_count = 0
+        self.pending_inputs = []
+        self.events = []
+        self.replay = None  # a ReplayRecorder or ReplayPlayer that sees every tick
+
+    def reset(self, seed=None):
+        """Start a new game on the runner's state"""
+        self.state.reset(seed)
+        self.accumulator = 0.0
+        self.tick_count = 0
+        self.pending_inputs.clear()
+
+    def queue_input(self, direction, player=0):
+        self.pending_inputs.append((player, direction))
+
+    def tick(self):
+        """Run exactly one fixed step and return its events"""
+        if self.replay is not None:
+            self.replay.before_tick(self)
+        self.tick_count += 1
+        events = step(self.state, self.pending_inputs, self.timestep)
+        self.pending_inputs.clear()
+        return events
+
+    def advance(self, frame_time, eager=False):
+        """Spend ``frame_time`` seconds of real time on whole ticks.
+
+        With ``eager`` set, queued input that would otherwise wait for the
+        next frame gets a tick now, borrowed from the next frame's time;
+        at most one tick is ever borrowed. Returns the events of the ticks
+        in a list reused every frame.
+        """
+        self.accumulator += min(frame_time, self.max_frame_time)
+        self.events.clear()
+        while self.accumulator >= self.timestep:
+            self.accumulator -= self.timestep
+            self.events.extend(self.tick())
+        if eager and self.pending_inputs and self.accumulator >= 0:
+            self.accumulator -= self.timestep
+            self.events.extend(self.tick())
+        return self.events
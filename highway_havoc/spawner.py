@@ -0,0 +1,122 @@
+"""Deciding when coins and spikes drop, and into which lane.
+
+Every spawn interval the scheduler requests one object and rolls whether
+it is a coin or a spike. A game driving down a planned
+:mod:`~highway_havoc.highway` instead requests the objects of each row it
+reaches, each in the row's own lane. A request without a lane is placed
+in a lane picked uniformly from the lanes whose spawn point is clear.
+Those lanes come as a bitmask from the top object of each lane in the
+store, and a table turns the bitmask into a tuple of lanes, so placing
+takes one draw and never retries. If the screen already holds
+``max_objects_on_screen`` objects, or the lane a request needs is
+blocked, the request waits in a short queue and is placed on the first
+tick with room. A request that finds the queue full is dropped.
+
+:attr:`SpawnScheduler.stats` counts the requested, placed, deferred and
+dropped spawns of a game for tuning.
+"""
+from collections import deque
+
+from .settings import ROAD_X, LANE_WIDTH, N_LANES
+from .store import COIN, SPIKE
+
+SPAWN_Y = -20
+SPAWN_CLEARANCE = 10
+MAX_QUEUED_SPAWNS = 4
+
+# x of a coin or spike spawned in each lane, and its size by kind
+SPAWN_X = tuple(ROAD_X + lane * LANE_WIDTH + LANE_WIDTH // 2 - 10 for lane in range(N_LANES))
+SPAWN_SIZE = {COIN: 20, SPIKE: 25}
+
+# The lanes set in each bitmask of free lanes, lowest first
+FREE_LANES = tuple(tuple(lane for lane in range(N_LANES) if mask >> lane & 1) for mask in range(1 << N_LANES))
+
+
+class SpawnStats:
+    """How many spawns a game requested, placed, deferred and dropped.
+
+    A deferred spawn is one that could not be placed on the tick it was
+    requested; it is counted as placed too once it is.
+    """
+    FIELDS = ('requested', 'placed', 'deferred', 'dropped')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requested = 0
+        self.placed = 0
+        self.deferred = 0
+        self.dropped = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self):
+        return f"SpawnStats({', '.join(f'{k}={v}' for k, v in self.as_dict().items())})"
+
+
+class SpawnScheduler:
+    """Requests spawns on the spawn interval or from the highway and places them in free lanes"""
+    def __init__(self, max_queued=MAX_QUEUED_SPAWNS):
+        self.max_queued = max_queued
+        self.queue = deque()  # (kind, lane or None) of the requests waiting for room
+        self.stats = SpawnStats()
+
+    def reset(self):
+        self.queue.clear()
+        self.stats.reset()
+
+    def request(self, kind, lane=None):
+        """Queue a spawn of ``kind``, in any free lane unless ``lane`` is given.
+
+        Returns False if it had to be dropped.
+        """
+        self.stats.requested += 1
+        if len(self.queue) >= self.max_queued:
+            self.stats.dropped += 1
+            return False
+        self.queue.append((kind, lane))
+        return True
+
+    def place(self, state):
+        """Drop queued spawns, oldest first, while there is room and a free lane"""
+        objects = state.objects
+        limit = state.tuning.max_objects_on_screen
+        free = None
+        while self.queue and objects.count < limit:
+            if free is None:
+                free = objects.clear_lanes(SPAWN_Y, SPAWN_CLEARANCE)
+            kind, lane = self.queue[0]
+            if lane is None:
+                lanes = FREE_LANES[free]
+                if not lanes:
+                    break
+                lane = lanes[state.rng.randrange(len(lanes))]
+            elif not free >> lane & 1:
+                break
+            self.queue.popleft()
+            size = SPAWN_SIZE[kind]
+            objects.add(kind, SPAWN_X[lane], SPAWN_Y, size, size)
+            free &= ~(1 << lane)
+            self.stats.placed += 1
+
+    def update(self, state):
+        """Request this tick's spawns, then place what fits"""
+        car = state.pace_car
+        queued = 0
+        if state.highway is not None:
+            if car.distance >= state.highway.next_distance:
+                for row in state.highway.due_rows(car.distance):
+                    for lane, kind in row:
+                        queued += self.request(kind, lane)
+        else:
+            tuning = state.tuning
+            speed_multiplier = max(car.speed / car.base_speed, 0.1) if car.speed > 0 else 0.1
+            dynamic_spawn_interval = tuning.base_spawn_interval / speed_multiplier
+            if state.time - state.last_spawn_time > dynamic_spawn_interval:
+                state.last_spawn_time = state.time
+                queued += self.request(COIN if state.rng.random() < tuning.coin_chance else SPIKE)
+        if self.queue:
+            self.place(state)
+            self.stats.deferred += min(queued, len(self.queue))  # new requests are last in the queue
@@ -0,0 +1,307 @@
+"""Struct-of-arrays storage for coins and spikes.
+
+Every falling object is a slot in a set of NumPy arrays (x, y, size, kind,
+fall speed, alive), so falling, culling off-screen objects and testing
+them against the car are a handful of array operations however many
+objects there are. ``Coin`` and ``Spikes`` are thin views onto a slot;
+each slot's views are made once and reused, and the hot-path operations
+write into preallocated scratch arrays, so a steady frame allocates no
+new objects.
+
+Objects never leave their lane, so the live slots are also indexed per
+lane, sorted by y. Spawn-clearance and car-overlap queries bisect the
+lanes they cover and only look at the objects near the query point,
+:meth:`FallingObjectStore.colliding` tests every car in the same pass, and
+:meth:`FallingObjectStore.clear_lanes` answers which lanes are clear as a
+bitmask.
+"""
+import math
+from bisect import bisect_left, bisect_right
+
+from .lazy import lazy_import
+from .settings import SCREEN_HEIGHT, ROAD_X, LANE_WIDTH, N_LANES
+
+np = lazy_import('numpy')  # loaded when the first store is made
+
+COIN = 0
+SPIKE = 1
+
+SMALL_COLLISION_TEST = 64  # objects x cars that are quicker to test one by one than with NumPy
+
+
+class FallingObjectStore:
+    def __init__(self, capacity=16, view_types=None):
+        self.view_types = view_types or {}
+        self.views = {}
+        self.count = 0  # live objects
+        self.spawned = 0
+        self.lanes = [[] for _ in range(N_LANES)]  # live slots, top of the screen first
+        self.fall_speeds_differ = False
+        self._common_fall_speed = None
+        self.unsorted = False  # set when a view moves an object
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.width = np.zeros(capacity)
+        self.height = np.zeros(capacity)
+        self.fall_speed = np.zeros(capacity)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.order = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.lane = np.zeros(capacity, dtype=np.int8)
+        self._scratch = np.zeros(capacity)
+        self._live = np.zeros(capacity)  # 1.0 in live slots, 0.0 elsewhere
+
+    def _grow(self):
+        old = (self.x, self.y, self.width, self.height, self.fall_speed, self.kind, self.order, self.alive, self.lane)
+        self._allocate(len(self.x) * 2)
+        new = (self.x, self.y, self.width, self.height, self.fall_speed, self.kind, self.order, self.alive, self.lane)
+        for old_array, new_array in zip(old, new):
+            new_array[:len(old_array)] = old_array
+
+    @property
+    def capacity(self):
+        return len(self.x)
+
+    @staticmethod
+    def lane_of(x):
+        """Lane an x position falls in, clamped to the road"""
+        return min(max(int((x - ROAD_X) // LANE_WIDTH), 0), N_LANES - 1)
+
+    def add(self, kind, x, y, width, height, fall_speed=5):
+        """Put a new object in a free slot and return the slot index"""
+        if self.count == self.capacity:
+            self._grow()
+        index = int(np.argmin(self.alive))
+        self.x[index] = x
+        self.y[index] = y
+        self.width[index] = width
+        self.height[index] = height
+        self.fall_speed[index] = fall_speed
+        self.kind[index] = kind
+        self.order[index] = self.spawned
+        self.spawned += 1
+        if self.count and fall_speed != self._common_fall_speed:
+            self.fall_speeds_differ = True
+        self._common_fall_speed = fall_speed
+        self.set_alive(index, True)
+        return index
+
+    def set_alive(self, index, alive):
+        if self.alive[index] == alive:
+            return
+        self.alive[index] = alive
+        if alive:
+            self.count += 1
+            lane = self.lane[index] = self.lane_of(self.x[index])
+            bucket = self.lanes[lane]
+            bucket.insert(bisect_right(bucket, self.y[index], key=self.y.__getitem__), index)
+        else:
+            self.count -= 1
+            self.lanes[self.lane[index]].remove(index)
+
+    def clear(self):
+        self.alive[:] = False
+        self.count = 0
+        self.spawned = 0
+        for bucket in self.lanes:
+            bucket.clear()
+        self.fall_speeds_differ = False
+        self.unsorted = False
+
+    def _sort_lanes(self):
+        """Rebuild the lane index after objects moved out of order"""
+        for bucket in self.lanes:
+            bucket.clear()
+        for index in np.flatnonzero(self.alive).tolist():
+            self.lane[index] = self.lane_of(self.x[index])
+            self.lanes[self.lane[index]].append(index)
+        for bucket in self.lanes:
+            bucket.sort(key=self.y.__getitem__)
+        self.unsorted = False
+
+    def slots(self):
+        """(index, kind, x, y, width, height, fall_speed, order) of every live slot"""
+        return [(index, int(self.kind[index]), float(self.x[index]), float(self.y[index]),
+                 float(self.width[index]), float(self.height[index]), float(self.fall_speed[index]),
+                 int(self.order[index]))
+                for index in np.flatnonzero(self.alive).tolist()]
+
+    def restore(self, slots, spawned):
+        """Replace every object with ``slots``, as returned by :meth:`slots`"""
+        self.clear()
+        while slots and max(slot[0] for slot in slots) >= self.capacity:
+            self._grow()
+        for index, kind, x, y, width, height, fall_speed, order in sorted(slots, key=lambda slot: slot[-1]):
+            self.x[index] = x
+            self.y[index] = y
+            self.width[index] = width
+            self.height[index] = height
+            self.fall_speed[index] = fall_speed
+            self.kind[index] = kind
+            self.order[index] = order
+            self.alive[index] = True
+            self._common_fall_speed = fall_speed
+        self.count = len(slots)
+        self.spawned = spawned
+        self.fall_speeds_differ = len({slot[6] for slot in slots}) > 1
+        self._sort_lanes()
+
+    def view(self, index):
+        """The Coin or Spikes object for a slot, made once per slot and kind"""
+        kind = int(self.kind[index])
+        key = (index, kind)
+        obj = self.views.get(key)
+        if obj is None:
+            obj = self.views[key] = self.view_types[kind].from_slot(self, index)
+        return obj
+
+    def live(self, kind):
+        """Views of the live objects of one kind, oldest first"""
+        indices = np.flatnonzero(self.alive & (self.kind == kind))
+        return [self.view(index) for index in indices[np.argsort(self.order[indices])]]
+
+    def fall(self, delta_time):
+        """Move every live object down and retire the ones off the screen"""
+        step = self._scratch
+        np.multiply(self.fall_speed, 50, out=step)
+        np.multiply(step, delta_time, out=step)
+        np.copyto(self._live, self.alive)
+        np.multiply(step, self._live, out=step)  # cheaper than where=, which allocates
+        np.add(self.y, step, out=self.y)
+        if self.unsorted or self.fall_speeds_differ:
+            self._sort_lanes()
+
+        # The lowest objects are at the end of each lane
+        y = self.y
+        for bucket in self.lanes:
+            while bucket and y[bucket[-1]] > SCREEN_HEIGHT:
+                self.alive[bucket.pop()] = False
+                self.count -= 1
+
+    def _lanes_between(self, left, right):
+        return self.lanes[self.lane_of(left):self.lane_of(right) + 1]
+
+    def overlapping(self, x, y, width, height):
+        """Slots of live objects within (width, height) of (x, y).
+
+        Coins come before spikes and each kind is in spawn order, the
+        order the game used to walk its coin and spike lists in.
+        """
+        if self.unsorted:
+            self._sort_lanes()
+        key = self.y.__getitem__
+        hits = []
+        for bucket in self._lanes_between(x - width, x + width):
+            start = bisect_right(bucket, y - height, key=key)
+            end = bisect_left(bucket, y + height, lo=start, key=key)
+            for index in bucket[start:end]:
+                if abs(self.x[index] - x) < width:
+                    hits.append(index)
+        if len(hits) > 1:
+            hits.sort(key=lambda index: (self.kind[index], self.order[index]))
+        return hits
+
+    def colliding(self, boxes):
+        """(slot, box) of every live object inside one of ``boxes``, in one pass.
+
+        ``boxes`` are (x, y, width, height) tuples, one per car, tested like
+        :meth:`overlapping`. The cars in each lane are grouped into runs
+        whose bands of y overlap; each run bisects the lane once and every
+        object in its band is tested against all of its cars at once, with
+        NumPy when there are many, so more cars add little work. An object
+        inside several boxes goes to the nearest in x, the first on a tie.
+        Hits come in the order :meth:`overlapping` gives them.
+        """
+        if len(boxes) == 1:
+            return [(index, 0) for index in self.overlapping(*boxes[0])]
+        if self.unsorted:
+            self._sort_lanes()
+        # The cars reaching into each lane
+        lane_boxes = [None] * N_LANES
+        for box, (x, _, width, _) in enumerate(boxes):
+            # lane_of, inlined
+            first = int((x - width - ROAD_X) // LANE_WIDTH)
+            first = 0 if first < 0 else N_LANES - 1 if first >= N_LANES else first
+            last = int((x + width - ROAD_X) // LANE_WIDTH)
+            last = 0 if last < 0 else N_LANES - 1 if last >= N_LANES else last
+            for lane in range(first, last + 1):
+                near = lane_boxes[lane]
+                if near is None:
+                    lane_boxes[lane] = [box]
+                else:
+                    near.append(box)
+
+        xs, ys = self.x, self.y
+        key = ys.__getitem__
+        hits = []
+        for near, bucket in zip(lane_boxes, self.lanes):
+            if near is None or not bucket:
+                continue
+            if len(near) > 1:
+                near.sort(key=lambda box: boxes[box][1] - boxes[box][3])  # top first
+            run_start = 0
+            while run_start < len(near):
+                # Extend the run while the next car's band overlaps it
+                _, y, _, height = boxes[near[run_start]]
+                top, bottom = y - height, y + height
+                run_end = run_start + 1
+                while run_end < len(near):
+                    _, y, _, height = boxes[near[run_end]]
+                    if y - height >= bottom:
+                        break
+                    if y + height > bottom:
+                        bottom = y + height
+                    run_end += 1
+                run_from, run_start = run_start, run_end
+
+                start = bisect_right(bucket, top, key=key)
+                end = bisect_left(bucket, bottom, lo=start, key=key)
+                if start == end:
+                    continue
+                if run_end - run_from == 1:
+                    # The band is this car's own, so only x is left to test
+                    box = near[run_from]
+                    x, _, width, _ = boxes[box]
+                    for index in bucket[start:end]:
+                        if abs(xs[index] - x) < width:
+                            hits.append((index, box))
+                elif (end - start) * (run_end - run_from) <= SMALL_COLLISION_TEST:
+                    run = sorted(near[run_from:run_end])  # box order, so ties go to the first
+                    slots = bucket[start:end]
+                    run_boxes = [(box, *boxes[box]) for box in run]
+                    # Plain floats, which are quicker to test than NumPy scalars
+                    for index, object_x, object_y in zip(slots, xs[slots].tolist(), ys[slots].tolist()):
+                        nearest, nearest_dx = None, math.inf
+                        for box, x, y, width, height in run_boxes:
+                            dx = abs(object_x - x)
+                            if dx < width and abs(object_y - y) < height and dx < nearest_dx:
+                                nearest, nearest_dx = box, dx
+                        if nearest is not None:
+                            hits.append((index, nearest))
+                else:
+                    run = sorted(near[run_from:run_end])
+                    slots = np.array(bucket[start:end])
+                    x, y, width, height = np.array([boxes[box] for box in run]).T
+                    dx = np.abs(xs[slots, None] - x)
+                    inside = (dx < width) & (np.abs(ys[slots, None] - y) < height)
+                    rows = np.flatnonzero(inside.any(axis=1))
+                    nearest = np.argmin(np.where(inside[rows], dx[rows], np.inf), axis=1)
+                    hits.extend(zip(slots[rows].tolist(), [run[column] for column in nearest.tolist()]))
+        if len(hits) > 1:
+            hits.sort(key=lambda hit: (self.kind[hit[0]], self.order[hit[0]]))
+        return hits
+
+    def clear_lanes(self, y, clearance):
+        """Bitmask of the lanes with no live object closer than ``clearance`` to ``y``"""
+        if self.unsorted:
+            self._sort_lanes()
+        key = self.y.__getitem__
+        mask = 0
+        for lane, bucket in enumerate(self.lanes):
+            start = bisect_right(bucket, y - clearance, key=key)
+            if start == len(bucket) or self.y[bucket[start]] >= y + clearance:
+                mask |= 1 << lane
+        return mask
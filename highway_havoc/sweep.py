@@ -0,0 +1,165 @@
+"""Monte Carlo balance sweeps.
+
+Plays seeded headless games for every combination of the tuning values
+given on the command line and reports how long cars survive, how far they
+get, how much money they end with and how often spawns had to wait for
+room or were dropped. Games are split into chunks of
+:class:`~highway_havoc.batch.BatchSimulation` runs and spread over a
+process pool, so a sweep scales with the number of cores.
+
+Every combination is played with the same seeds, so differences between
+rows come from the tuning and not from luck.
+
+Example::
+
+    python -m highway_havoc.sweep --set base_spawn_interval=1.0,1.5,2.0 \\
+        --set coin_chance=0.5,0.6 --games 4000 --policy dodge
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .batch import BatchSimulation, POLICIES
+from .settings import FIXED_TIMESTEP, Tuning
+from .spawner import SpawnStats
+
+PERCENTILES = (10, 50, 90)
+
+
+def parse_setting(text):
+    """Turn ``name=1,2,3`` into ``(name, [1, 2, 3])``"""
+    name, _, values = text.partition('=')
+    name = name.strip()
+    if name not in Tuning.FIELDS:
+        raise argparse.ArgumentTypeError(f"unknown tuning constant {name!r}, pick from {', '.join(Tuning.FIELDS)}")
+    try:
+        parsed = [float(value) for value in values.split(',') if value.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad values for {name}: {values!r}")
+    if not parsed:
+        raise argparse.ArgumentTypeError(f"no values given for {name}")
+    if name == 'max_objects_on_screen' or all(value.is_integer() for value in parsed):
+        parsed = [int(value) for value in parsed]
+    return name, parsed
+
+
+def positive_int(text):
+    """An argparse type for counts that must be at least 1"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a whole number: {text!r}")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+
+def play_chunk(task):
+    """Play one chunk of games in a worker process"""
+    overrides, seed, n_games, max_ticks, policy = task
+    batch = BatchSimulation(n_games, seed=seed, tuning=Tuning(**overrides))
+    batch.run(max_ticks, POLICIES[policy])
+    survival = np.where(batch.playing, batch.time, batch.end_time)
+    spawns = [batch.spawn_stats[name] for name in SpawnStats.FIELDS]
+    return survival, batch.distance, batch.money, batch.playing, *spawns
+
+
+def summarise(values):
+    summary = {'mean': float(np.mean(values))}
+    for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f'p{p}'] = float(value)
+    return summary
+
+
+def run_sweep(settings, games=1000, chunk_size=250, max_time=300.0, policy='dodge', seed=0, workers=None):
+    """Play ``games`` games for every combination of ``settings``.
+
+    ``settings`` is a list of ``(name, values)`` pairs. Returns one result
+    dict per combination.
+    """
+    if games < 1 or chunk_size < 1:
+        raise ValueError(f"a sweep needs at least one game per combination and chunk, not {games} and {chunk_size}")
+    names = [name for name, _ in settings]
+    combinations = [dict(zip(names, values)) for values in itertools.product(*(values for _, values in settings))]
+    max_ticks = int(round(max_time / FIXED_TIMESTEP))
+
+    chunks = [min(chunk_size, games - start) for start in range(0, games, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = [(overrides, chunk_seed, n_games, max_ticks, policy)
+             for overrides in combinations
+             for chunk_seed, n_games in zip(seeds, chunks)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(play_chunk, tasks))
+
+    results = []
+    for i, overrides in enumerate(combinations):
+        parts = outcomes[i * len(chunks):(i + 1) * len(chunks)]
+        survival, distance, money, still_playing, *spawns = (np.concatenate(column) for column in zip(*parts))
+        results.append({
+            'tuning': Tuning(**overrides).as_dict(),
+            'games': int(len(survival)),
+            'survived_max_time': float(np.mean(still_playing)),
+            'survival_time': summarise(survival),
+            'distance': summarise(distance),
+            'money': summarise(money),
+            'spawns': {name: float(np.mean(counts)) for name, counts in zip(SpawnStats.FIELDS, spawns)},
+        })
+    return results
+
+
+def format_results(settings, results):
+    names = [name for name, _ in settings]
+    header = names + ['survival p10/p50/p90 (s)', 'distance p50', 'money mean', 'money p50', 'timed out',
+                      'spawns deferred/dropped']
+    rows = []
+    for result in results:
+        survival = result['survival_time']
+        spawns = result['spawns']
+        rows.append([str(result['tuning'][name]) for name in names] + [
+            f"{survival['p10']:.1f}/{survival['p50']:.1f}/{survival['p90']:.1f}",
+            f"{result['distance']['p50']:.0f}",
+            f"{result['money']['mean']:.1f}",
+            f"{result['money']['p50']:.0f}",
+            f"{result['survived_max_time']:.1%}",
+            f"{spawns['deferred'] / max(spawns['requested'], 1):.0%}/{spawns['dropped'] / max(spawns['requested'], 1):.0%}",
+        ])
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+    lines = ['  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in [header] + rows]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep balance constants over headless seeded games.")
+    parser.add_argument('--set', dest='settings', action='append', type=parse_setting, default=[],
+                        metavar='NAME=V1,V2', help=f"tuning values to try, one of: {', '.join(Tuning.FIELDS)}")
+    parser.add_argument('--games', type=positive_int, default=1000, help="games per combination")
+    parser.add_argument('--chunk-size', type=positive_int, default=250, help="games per worker task")
+    parser.add_argument('--max-time', type=float, default=300.0, help="seconds of game time before a run is cut off")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='dodge', help="bot that steers the car")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--json', metavar='PATH', help="also write the full results as JSON")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    results = run_sweep(args.settings, args.games, args.chunk_size, args.max_time,
+                        args.policy, args.seed, args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(format_results(args.settings, results))
+    print(f"\n{len(results) * args.games} games on {args.workers or os.cpu_count()} workers in {elapsed:.1f}s")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'policy': args.policy, 'seed': args.seed, 'max_time': args.max_time,
+                       'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Font and rendered-text caches.
+
+Building a ``pygame.font.Font`` and rendering a string are the slowest
+things a HUD does, and most frames draw exactly the same strings as the
+frame before. Fonts are made once per size, rendered surfaces are kept in a
+size-bounded LRU cache, and :class:`TextLabel` only re-renders when its
+text actually changes. Fading texts come from :class:`FadeCache`.
+"""
+import threading
+from collections import OrderedDict
+
+from .lazy import lazy_import
+
+pygame = lazy_import('pygame')
+
+_fonts = {}
+_font_lock = threading.Lock()  # FreeType can't open two fonts at once
+
+
+def get_font(size):
+    """Default font at ``size``, created on first use.
+
+    The font module itself is started by the first call. Safe to call from
+    the asset loader thread.
+    """
+    font = _fonts.get(size)
+    if font is None:
+        with _font_lock:
+            font = _fonts.get(size)
+            if font is None:
+                if not pygame.font.get_init():
+                    pygame.font.init()
+                font = _fonts[size] = pygame.font.Font(None, size)
+    return font
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (text, size, color).
+
+    Memory is bounded by the pixel data of the cached surfaces rather than
+    their number, since a title takes far more room than a "+10".
+    """
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, size, color):
+        key = (text, size, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = get_font(size).render(text, True, color)
+        self.surfaces[key] = surface
+        self.bytes_used += self._surface_bytes(surface)
+        while self.bytes_used > self.max_bytes and len(self.surfaces) > 1:
+            _, evicted = self.surfaces.popitem(last=False)
+            self.bytes_used -= self._surface_bytes(evicted)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+        self.bytes_used = 0
+
+    @staticmethod
+    def _surface_bytes(surface):
+        return surface.get_pitch() * surface.get_height()
+
+
+text_cache = TextCache()
+
+
+def render_text(text, size, color):
+    return text_cache.render(text, size, color)
+
+
+class FadeCache:
+    """A rendered text at ``steps`` levels of fading, each made on first use.
+
+    The fade is baked into the copy's per-pixel alpha, so drawing a fading
+    text is a plain blit of a surface that already exists.
+    """
+    def __init__(self, steps=32, max_texts=256):
+        self.steps = steps
+        self.max_texts = max_texts
+        self.faded = {}  # (text, size, color): [surface or None for each step]
+
+    def render(self, text, size, color, step):
+        """The text ``step`` steps of ``steps`` into fading out"""
+        key = (text, size, color)
+        faded = self.faded.get(key)
+        if faded is None:
+            if len(self.faded) >= self.max_texts:
+                self.faded.clear()
+            faded = self.faded[key] = [None] * self.steps
+        surface = faded[step]
+        if surface is None:
+            surface = faded[step] = render_text(text, size, color).copy()
+            alpha = 255 - 255 * step // self.steps
+            surface.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+        return surface
+
+
+fade_cache = FadeCache()
+
+
+class TextLabel:
+    """A piece of HUD text that is only re-rendered when it changes"""
+    def __init__(self, size, color):
+        self.size = size
+        self.color = color
+        self.text = None
+        self.surface = None
+
+    def render(self, text):
+        if text != self.text:
+            self.text = text
+            self.surface = get_font(self.size).render(text, True, self.color)
+        return self.surface
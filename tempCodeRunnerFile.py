@@ -3,8 +3,6 @@ import time
 # GUI
 # OOP
 
-pygame.init()
-
 class GameState:
     def __init__(self):
         self.money = 0
@@ -71,8 +69,7 @@ class player(GameObject):
 # Screen dimensions
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Highway Havoc")
+screen = None  # opened by open_window()
 
 # Game states
 MENU_STATE = 0
@@ -84,13 +81,23 @@ ROAD_WIDTH = 400
 LANE_WIDTH = ROAD_WIDTH // 4
 ROAD_X = (SCREEN_WIDTH - ROAD_WIDTH) // 2
 
-# Load sounds
-try:
-    coin_sound = pygame.mixer.Sound('coin.mp3')
-    spike_sound = pygame.mixer.Sound('spike.mp3')
-except FileNotFoundError:
-    coin_sound = None
-    spike_sound = None
+coin_sound = None
+spike_sound = None
+
+def open_window():
+    """Start pygame, open the window and load sounds; not done on import"""
+    global screen, coin_sound, spike_sound
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Highway Havoc")
+
+    # Load sounds
+    try:
+        coin_sound = pygame.mixer.Sound('coin.mp3')
+        spike_sound = pygame.mixer.Sound('spike.mp3')
+    except FileNotFoundError:
+        coin_sound = None
+        spike_sound = None
 
 class Car(GameObject):
     def __init__(self, x, y, width, height, player_id, color='blue'):
@@ -454,6 +461,8 @@ import sys
 
 async def main():
     global last_spawn_time, road_scroll_offset
+    if screen is None:
+        open_window()
     running = True
     
     while running:
@@ -565,5 +574,4 @@ if platform.system() == "Emscripten":
 else:
     if __name__ == "__main__":
         asyncio.run(main())
-
-pygame.quit()
\ No newline at end of file
+        pygame.quit()
\ No newline at end of file
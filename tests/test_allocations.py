@@ -0,0 +1,92 @@
+"""A steady game allocates next to nothing per tick or per drawn frame."""
+import random
+import tracemalloc
+from array import array
+
+import pygame
+import pytest
+
+from highway_havoc.bots import dodge_bot
+from highway_havoc.render import Hud, draw_playing
+from highway_havoc.road import RoadLayer
+from highway_havoc.settings import SCREEN_WIDTH, SCREEN_HEIGHT
+from highway_havoc.simulation import SimulationState, FixedStepRunner
+
+WARMUP_TICKS = 1200
+MEASURED_TICKS = 3000
+MAX_TICK_BYTES = 768  # peak above the level before the tick, in the median tick
+MAX_FRAME_BYTES = 1280  # the same for drawing a frame; mostly the popups' few small arrays
+MAX_RETAINED_BYTES = 16384  # the live effects and popups come and go; a leak of a few bytes a tick won't fit
+
+
+def warmed_up_game(players):
+    """A game that a dodge bot per car has been playing for a while.
+
+    Returns the runner and a function that queues the bots' next moves.
+    """
+    state = SimulationState(seed=3, players=players)
+    runner = FixedStepRunner(state)
+    runner.reset()
+    rng = random.Random(0)
+
+    def steer():
+        for player, car in enumerate(state.cars):
+            move = dodge_bot(state, rng, car)
+            if move:
+                runner.queue_input(move, player)
+
+    for _ in range(WARMUP_TICKS):
+        steer()
+        runner.tick()
+    return runner, steer
+
+
+@pytest.mark.parametrize('players', [1, 2])
+def test_steady_ticks_allocate_little(players):
+    runner, steer = warmed_up_game(players)
+    tracemalloc.start()
+    try:
+        peaks = array('q', bytes(8 * MEASURED_TICKS))  # filled in place, so recording allocates nothing
+        retained = 0
+        for index in range(MEASURED_TICKS):
+            steer()  # the bots' own allocations don't count
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            runner.tick()
+            after, peak = tracemalloc.get_traced_memory()
+            peaks[index] = peak - before
+            retained += after - before
+    finally:
+        tracemalloc.stop()
+    assert runner.state.playing, "the bots should still be driving"
+    assert sorted(peaks)[MEASURED_TICKS // 2] <= MAX_TICK_BYTES
+    assert retained <= MAX_RETAINED_BYTES
+
+
+@pytest.mark.parametrize('players', [1, 2])
+def test_steady_frames_allocate_little(players):
+    runner, steer = warmed_up_game(players)
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    road, hud = RoadLayer(), Hud()
+    for _ in range(WARMUP_TICKS // 4):  # fill the text and fade caches
+        steer()
+        runner.tick()
+        draw_playing(screen, runner.state, road, hud)
+    tracemalloc.start()
+    try:
+        peaks = array('q', bytes(8 * MEASURED_TICKS))
+        retained = 0
+        for index in range(MEASURED_TICKS):
+            steer()
+            runner.tick()
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            draw_playing(screen, runner.state, road, hud)
+            after, peak = tracemalloc.get_traced_memory()
+            peaks[index] = peak - before
+            retained += after - before
+    finally:
+        tracemalloc.stop()
+    assert runner.state.playing, "the bots should still be driving"
+    assert sorted(peaks)[MEASURED_TICKS // 2] <= MAX_FRAME_BYTES
+    assert retained <= MAX_RETAINED_BYTES  # new money texts and slot views, which the caches bound
@@ -0,0 +1,82 @@
+"""BatchSimulation plays by the same rules as the object simulation."""
+import numpy as np
+
+from highway_havoc.batch import BatchSimulation, N_FREE_LANES
+from highway_havoc.simulation import SimulationState, FixedStepRunner
+
+N_GAMES = 60
+MAX_TICKS = 4000
+
+
+class RecordingBatch(BatchSimulation):
+    """A batch that notes every spawn draw it makes, per tick and game"""
+    def __init__(self, *args, **kwargs):
+        self.draws = {}  # (tick, game): {'kind': roll, 'lanes': [index, ...]}
+        super().__init__(*args, **kwargs)
+
+    def _draws_of(self, game):
+        return self.draws.setdefault((self.ticks, int(game)), {'kind': None, 'lanes': []})
+
+    def draw_kinds(self, games):
+        rolls = super().draw_kinds(games)
+        for game, roll in zip(games, rolls):
+            self._draws_of(game)['kind'] = float(roll)
+        return rolls
+
+    def _free_lanes(self, games):
+        free = super()._free_lanes(games)
+        self._placing = games[N_FREE_LANES[free] > 0]  # the games draw_lanes is about to draw for
+        return free
+
+    def draw_lanes(self, n_free):
+        picks = super().draw_lanes(n_free)
+        for game, pick in zip(self._placing, picks):
+            self._draws_of(game)['lanes'].append(int(pick))
+        return picks
+
+
+class ReplayedDraws:
+    """Stands in for a game's random.Random, giving it one batch game's draws"""
+    words = 0
+
+    def __init__(self, draws, game):
+        self.draws = draws
+        self.game = game
+        self.current = None
+
+    def start_tick(self, tick):
+        draws = self.draws.get((tick, self.game))
+        self.current = None if draws is None else {'kind': draws['kind'], 'lanes': list(draws['lanes'])}
+
+    def random(self):
+        return self.current['kind']
+
+    def randrange(self, n):
+        return self.current['lanes'].pop(0)
+
+
+def test_batch_matches_object_games():
+    moves = np.random.default_rng(9).choice([-1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1], size=(MAX_TICKS, N_GAMES))
+    batch = RecordingBatch(N_GAMES, seed=1)
+    while batch.ticks < MAX_TICKS and batch.playing.any():
+        batch.step(moves[batch.ticks])
+
+    for game in range(N_GAMES):
+        rng = ReplayedDraws(batch.draws, game)
+        state = SimulationState(rng=rng)
+        runner = FixedStepRunner(state)
+        runner.reset()
+        while state.playing and runner.tick_count < batch.ticks:
+            if moves[runner.tick_count, game]:
+                runner.queue_input(int(moves[runner.tick_count, game]))
+            rng.start_tick(runner.tick_count + 1)
+            runner.tick()
+
+        game_state = state.game_state
+        assert game_state.money == batch.money[game]
+        assert game_state.coins_collected == batch.coins_collected[game]
+        assert game_state.spikes_hit == batch.spikes_hit[game]
+        assert state.playing == batch.playing[game]
+        assert state.spawner.stats.as_dict() == {name: counts[game] for name, counts in batch.spawn_stats.items()}
+        # Effects are summed differently, so distances may differ in the last bits
+        assert abs(state.car.distance - batch.distance[game]) <= 1e-9 * max(1.0, abs(batch.distance[game]))
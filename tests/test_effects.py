@@ -0,0 +1,66 @@
+"""The closed-form EffectTimeline moves a car as the per-tick timers did."""
+import random
+
+import pytest
+
+from highway_havoc.clock import SimulatedClock
+from highway_havoc.effects import BOOST, SLOWDOWN
+from highway_havoc.entities import Car
+from highway_havoc.settings import FIXED_TIMESTEP
+
+TICKS = 3000
+
+
+def timers_speed_and_offset(base_speed, boost_timers, spike_timers, current_time, delta_time):
+    """Speed and position offset as Car worked them out from its timer lists"""
+    speed, position_offset = base_speed, 0
+    for boost in boost_timers:
+        t = current_time - boost['start_time']
+        if t < 3:
+            speed += boost['amount']
+            position_offset += -boost['amount'] * 10 * (1 - (t / 3) ** 2) * delta_time
+        elif t < 7:
+            progress = (t - 3) / 4
+            remaining_boost = boost['amount'] * (1 - progress)
+            speed += remaining_boost
+            position_offset += -remaining_boost * 5 * (1 - (1 - progress) ** 2) * delta_time
+    for spike in spike_timers:
+        t = current_time - spike['start_time']
+        if t < 2:
+            speed -= spike['amount']
+            position_offset += spike['amount'] * 10 * (1 - (t / 2) ** 2) * delta_time
+        elif t < 6:
+            progress = (t - 2) / 4
+            remaining_slowdown = spike['amount'] * (1 - progress)
+            speed -= remaining_slowdown
+            position_offset += remaining_slowdown * 5 * (1 - (1 - progress) ** 2) * delta_time
+    return max(speed, 0), max(min(position_offset, 0), -100)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_timeline_matches_timers(seed):
+    rng = random.Random(seed)
+    car = Car(375, 400, 50, 30, 1, clock=SimulatedClock())
+    boost_timers, spike_timers = [], []
+    distance = 0
+    for _ in range(TICKS):
+        car.clock.tick(FIXED_TIMESTEP)
+        now = car.clock.now
+        if rng.random() < 0.02:  # pickups come in bursts often enough to overlap
+            shape, timers = (BOOST, boost_timers) if rng.random() < 0.6 else (SLOWDOWN, spike_timers)
+            amount = rng.choice((5, 7.5, 15, 20, 30))
+            car.effects.add(shape, now, amount)
+            timers.append({'start_time': now, 'amount': amount})
+
+        car.update_speed_and_position(FIXED_TIMESTEP)
+        speed, position_offset = timers_speed_and_offset(car.base_speed, boost_timers, spike_timers,
+                                                         now, FIXED_TIMESTEP)
+        distance += speed * FIXED_TIMESTEP * 10
+        assert car.speed == pytest.approx(speed, abs=1e-9)
+        assert car.position_offset == pytest.approx(position_offset, abs=1e-9)
+        assert car.distance == pytest.approx(distance, rel=1e-9)
+
+        # Speed at a later time comes straight from the timeline, without ticking
+        later = now + rng.uniform(0, 8)
+        expected, _ = timers_speed_and_offset(car.base_speed, boost_timers, spike_timers, later, 0)
+        assert car.speed_at(later) == pytest.approx(expected, abs=1e-9)
@@ -0,0 +1,88 @@
+"""Replays play back, and seek to, exactly the game that was recorded."""
+import random
+
+import pytest
+
+from highway_havoc.bots import dodge_bot
+from highway_havoc.replay import Replay, ReplayPlayer, ReplayRecorder, capture_state, outcome
+from highway_havoc.simulation import SimulationState, FixedStepRunner
+
+MAX_TICKS = 60 * 60  # long enough to pass a few keyframes
+
+
+def record_games(seed, highway, games=2):
+    """Play ``games`` games in a row on one state, with a dodge bot that
+    sometimes steers at random.
+
+    Yields each game's replay bytes, its outcome and snapshots of the
+    state at a few ticks.
+    """
+    state = SimulationState(seed=seed, highway=highway)
+    runner = FixedStepRunner(state)
+    driver = random.Random(1000 + seed)
+    for game in range(games):
+        runner.reset(seed + 100 * game)
+        recorder = ReplayRecorder()
+        recorder.start(runner)
+        snapshots = {}
+        while state.playing and runner.tick_count < MAX_TICKS:
+            move = dodge_bot(state, driver) if driver.random() < 0.97 else driver.choice((-1, 1))
+            if move:
+                runner.queue_input(move)
+            if driver.random() < 0.002:
+                runner.queue_input(1)  # two changes on one tick
+                runner.queue_input(-1)
+            runner.advance(driver.choice((1 / 60, 1 / 30, 0.02, 0.007)))
+            if driver.random() < 0.004:
+                snapshots[runner.tick_count] = capture_state(state)
+        yield recorder.finish(), outcome(state), snapshots
+
+
+@pytest.mark.parametrize('highway', [False, True])
+@pytest.mark.parametrize('seed', range(3))
+def test_round_trip_and_seek(seed, highway):
+    shuffle = random.Random(seed)
+    for data, recorded_outcome, snapshots in record_games(seed, highway):
+        replay = Replay.from_bytes(data)
+        assert replay.outcome == recorded_outcome
+        player = ReplayPlayer(replay)
+        assert outcome(player.run()) == recorded_outcome
+
+        ticks = list(snapshots)
+        shuffle.shuffle(ticks)  # backwards as well as forwards
+        for tick in ticks:
+            player.seek(tick)
+            assert capture_state(player.state) == snapshots[tick], tick
+
+        player.seek(replay.ticks // 2)
+        assert outcome(player.run()) == recorded_outcome
+
+
+def test_restarts_draw_a_fresh_seed():
+    state = SimulationState(seed=5, highway=True)
+    runner = FixedStepRunner(state)
+    runner.reset()
+    assert state.seed == 5  # the first game keeps the seed the state was made with
+    seeds = [state.seed]
+    for _ in range(3):
+        for _ in range(60):
+            runner.tick()
+        runner.reset()
+        recorder = ReplayRecorder()
+        recorder.start(runner)
+        runner.tick()
+        replay = Replay.from_bytes(recorder.finish())
+        assert replay.seed == state.seed == state.highway.seed
+        assert replay.rng_words == 0  # the rng starts from the new seed
+        seeds.append(state.seed)
+    assert len(set(seeds)) == len(seeds)
+
+    runner.reset(5)
+    assert state.seed == 5
+
+
+def test_recorder_refuses_two_players():
+    runner = FixedStepRunner(SimulationState(seed=1, players=2))
+    runner.reset()
+    with pytest.raises(ValueError):
+        ReplayRecorder().start(runner)
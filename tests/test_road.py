@@ -0,0 +1,36 @@
+"""RoadLayer looks the same as drawing the road every frame."""
+import pygame
+import pytest
+
+from highway_havoc.road import MARKING_SPACING, RoadLayer
+from highway_havoc.settings import SCREEN_WIDTH, SCREEN_HEIGHT, ROAD_X, ROAD_WIDTH, LANE_WIDTH
+
+SCROLL_OFFSETS = [0, 0.5, 1.7, 37.2, 99.9, 100, 150.3, 12345.67] + [i * 0.73 for i in range(300)]
+
+
+def draw_road_per_frame(screen, road_scroll_offset):
+    """The road as main() drew it before it was pre-rendered"""
+    screen.fill('black')
+    pygame.draw.rect(screen, 'grey50', (ROAD_X, 0, ROAD_WIDTH, SCREEN_HEIGHT))
+    for i in range(1, 4):
+        pygame.draw.line(screen, 'white', (ROAD_X + i * LANE_WIDTH, 0), (ROAD_X + i * LANE_WIDTH, SCREEN_HEIGHT), 2)
+    marking_offset = int(road_scroll_offset) % MARKING_SPACING
+    for y in range(-MARKING_SPACING + marking_offset, SCREEN_HEIGHT + MARKING_SPACING, MARKING_SPACING):
+        pygame.draw.rect(screen, 'white', (ROAD_X + ROAD_WIDTH // 2 - 5, y, 10, 40))
+
+
+@pytest.fixture
+def screen():
+    pygame.display.init()
+    yield pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.quit()
+
+
+def test_road_layer_matches_per_frame_drawing(screen):
+    expected = screen.copy()
+    drawn = screen.copy()
+    road = RoadLayer()
+    for offset in SCROLL_OFFSETS:
+        draw_road_per_frame(expected, offset)
+        road.draw(drawn, offset)
+        assert pygame.image.tobytes(drawn, 'RGB') == pygame.image.tobytes(expected, 'RGB'), offset
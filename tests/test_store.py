@@ -0,0 +1,101 @@
+"""FallingObjectStore's indexed queries agree with scanning every slot."""
+import random
+
+import numpy as np
+import pytest
+
+from highway_havoc.bots import dodge_bot
+from highway_havoc.settings import ROAD_X, LANE_WIDTH, N_LANES
+from highway_havoc.simulation import SimulationState, FixedStepRunner
+from highway_havoc.store import COIN, SPIKE, FallingObjectStore
+
+
+def scan_overlapping(store, x, y, width, height):
+    inside = store.alive & (np.abs(store.x - x) < width) & (np.abs(store.y - y) < height)
+    return sorted(np.flatnonzero(inside).tolist(), key=lambda index: (store.kind[index], store.order[index]))
+
+
+def scan_clear_lanes(store, y, clearance):
+    mask = (1 << N_LANES) - 1
+    for index in np.flatnonzero(store.alive & (np.abs(store.y - y) < clearance)).tolist():
+        mask &= ~(1 << store.lane_of(store.x[index]))
+    return mask
+
+
+def scan_colliding(store, boxes):
+    hits = []
+    for index in np.flatnonzero(store.alive).tolist():
+        inside = [(abs(store.x[index] - x), box) for box, (x, y, width, height) in enumerate(boxes)
+                  if abs(store.x[index] - x) < width and abs(store.y[index] - y) < height]
+        if inside:
+            hits.append((index, min(inside)[1]))  # the nearest box, the first on a tie
+    return sorted(hits, key=lambda hit: (store.kind[hit[0]], store.order[hit[0]]))
+
+
+def random_stores(seed, stores=40, ticks=300):
+    """Stores filled, emptied and fallen at random, yielded after every tick"""
+    rng = random.Random(seed)
+    for trial in range(stores):
+        store = FallingObjectStore(4)
+        mixed_speeds = trial % 2 == 1  # makes the store re-sort its lanes
+        for _ in range(ticks):
+            if rng.random() < 0.3:
+                lane = rng.randrange(N_LANES)
+                x = ROAD_X + lane * LANE_WIDTH + 40 + rng.choice((0, 0, 0, rng.uniform(-60, 60)))
+                fall_speed = rng.choice((5, 5, 5, 3)) if mixed_speeds else 5
+                store.add(rng.choice((COIN, SPIKE)), x, -20 + rng.uniform(-5, 5), 20, 20, fall_speed)
+            if store.count and rng.random() < 0.05:
+                store.set_alive(rng.choice(np.flatnonzero(store.alive).tolist()), False)
+            store.fall(1 / 60)
+            yield rng, store
+
+
+@pytest.mark.parametrize('seed', [1, 2])
+def test_queries_match_a_full_scan(seed):
+    for rng, store in random_stores(seed):
+        x, y = rng.uniform(ROAD_X - 50, ROAD_X + N_LANES * LANE_WIDTH + 50), rng.uniform(-50, 650)
+        assert store.overlapping(x, y, 50, 30) == scan_overlapping(store, x, y, 50, 30)
+        clearance = rng.choice((10, 30))
+        assert store.clear_lanes(y, clearance) == scan_clear_lanes(store, y, clearance)
+        assert store.count == int(store.alive.sum()) == sum(map(len, store.lanes))
+
+
+@pytest.mark.parametrize('cars', [2, 3, 8, 20])
+def test_colliding_matches_a_full_scan(cars):
+    for rng, store in random_stores(cars, stores=4):
+        boxes = [(ROAD_X + rng.randrange(N_LANES) * LANE_WIDTH + rng.choice((25, 25, rng.uniform(0, 100))),
+                  rng.uniform(-50, 650), 50, 30) for _ in range(cars)]
+        assert store.colliding(boxes) == scan_colliding(store, boxes)
+
+
+def test_two_player_steps_collide_in_one_pass(monkeypatch):
+    calls = {'colliding': [], 'overlapping': 0}
+    colliding, overlapping = FallingObjectStore.colliding, FallingObjectStore.overlapping
+
+    def spy_colliding(store, boxes):
+        hits = colliding(store, boxes)
+        calls['colliding'].append((len(boxes), len(hits)))
+        return hits
+
+    def spy_overlapping(store, *box):
+        calls['overlapping'] += 1
+        return overlapping(store, *box)
+
+    monkeypatch.setattr(FallingObjectStore, 'colliding', spy_colliding)
+    monkeypatch.setattr(FallingObjectStore, 'overlapping', spy_overlapping)
+    state = SimulationState(seed=3, players=2)
+    runner = FixedStepRunner(state)
+    runner.reset()
+    rng = random.Random(0)
+    for _ in range(1200):
+        if not all(car.speed > 0 for car in state.cars):
+            break
+        for player, car in enumerate(state.cars):
+            move = dodge_bot(state, rng, car)
+            if move:
+                runner.queue_input(move, player)
+        runner.tick()
+    assert len(calls['colliding']) >= 600
+    assert all(boxes == 2 for boxes, _ in calls['colliding'])
+    assert sum(hits for _, hits in calls['colliding']) > 0
+    assert calls['overlapping'] == 0  # no query per car